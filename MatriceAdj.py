@@ -1,33 +1,168 @@
-def MxM(A, B):
-    n = len(A)
-    result = [[0 for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            for k in range(n):
-                result[i][j] += A[i][k] * B[k][j] 
-    return result
+"""
+Adjacency matrix module.
+Walk counting, k-hop reachability and hop-bounded latencies from the
+adjacency matrix of any Graph, using exponentiation by squaring.
+
+Semirings:
+    'count'  : (+, x)    entry [i][j] of A^p = number of walks of length p
+    'bool'   : (or, and) entry [i][j] of (I + A)^k = j reachable in <= k hops
+    'minplus': (min, +)  entry [i][j] of W^k = shortest latency using <= k hops
+"""
+
+import numpy as np
+
+# Original 10-city adjacency matrix
+MATRICE = [
+    [0, 1, 1, 1, 1, 0, 0, 0, 0, 0],
+    [1, 0, 0, 1, 0, 1, 0, 0, 0, 0],
+    [1, 0, 0, 0, 0, 1, 1, 0, 0, 0],
+    [1, 1, 0, 0, 1, 0, 0, 0, 1, 0],
+    [1, 0, 0, 1, 0, 0, 0, 1, 1, 0],
+    [0, 1, 1, 0, 0, 0, 1, 0, 1, 1],
+    [0, 0, 1, 0, 0, 1, 0, 0, 0, 1],
+    [0, 0, 0, 0, 1, 0, 0, 0, 1, 0],
+    [0, 0, 0, 1, 1, 1, 0, 1, 0, 0],
+    [0, 0, 0, 0, 0, 1, 1, 0, 0, 0]
+]
+
+# Size of the rows x n x n temporary of the min-plus product, whatever n
+MINPLUS_BUFFER_BYTES = 64 * 2**20
+
+
+def adjacency_matrix(graph, semiring='count', exact=False):
+    """
+    Build the adjacency matrix of a Graph, rows/columns in graph.get_nodes() order.
+
+    Args:
+        graph: Graph to convert
+        semiring: 'count' (number of parallel edges), 'bool' or 'minplus'
+            (edge weights, inf when absent, 0 on the diagonal)
+        exact: For 'count', use Python integers (object dtype) so that large
+            powers never overflow
+
+    Returns:
+        numpy.ndarray: n x n matrix
+    """
+    compact = graph.freeze()
+    offsets, targets, weights = compact.as_numpy()
+    n = compact.num_nodes
+    sources = np.repeat(np.arange(n), np.diff(offsets))
+
+    if semiring == 'count':
+        matrix = np.zeros((n, n), dtype=np.int64)
+        np.add.at(matrix, (sources, targets), 1)
+        return matrix.astype(object) if exact else matrix
+    if semiring == 'bool':
+        matrix = np.zeros((n, n), dtype=bool)
+        matrix[sources, targets] = True
+        return matrix
+    if semiring == 'minplus':
+        matrix = np.full((n, n), np.inf)
+        np.minimum.at(matrix, (sources, targets), weights)
+        np.fill_diagonal(matrix, np.minimum(np.diagonal(matrix), 0))
+        return matrix
+    raise ValueError(f"Unknown semiring {semiring}")
+
+
+def identity(n, semiring='count', dtype=np.int64):
+    """Neutral element of the matrix product in a semiring."""
+    if semiring == 'bool':
+        return np.eye(n, dtype=bool)
+    if semiring == 'minplus':
+        matrix = np.full((n, n), np.inf)
+        np.fill_diagonal(matrix, 0)
+        return matrix
+    matrix = np.zeros((n, n), dtype=dtype)
+    np.fill_diagonal(matrix, 1)
+    return matrix
+
+
+def MxM(A, B, semiring='count'):
+    """
+    Matrix product in the given semiring.
+
+    Raises:
+        OverflowError: If a fixed-width integer 'count' product could
+            overflow (use object matrices, e.g. exact=True, instead)
+    """
+    A, B = np.asarray(A), np.asarray(B)
+    if semiring == 'count':
+        if A.dtype.kind in 'iu' and B.dtype.kind in 'iu':
+            # Float bound of every partial sum: no wrap-around if it fits
+            bound = np.abs(A).astype(np.float64).dot(np.abs(B).astype(np.float64))
+            limit = np.iinfo(np.result_type(A, B)).max
+            if bound.size and bound.max() >= limit * (1 - 1e-9):
+                raise OverflowError("Walk counts exceed the integer range, use exact=True")
+        return A.dot(B)
+    if semiring == 'bool':
+        return A.astype(np.int64).dot(B.astype(np.int64)) > 0
+    if semiring == 'minplus':
+        result = np.empty((A.shape[0], B.shape[1]))
+        rows = max(1, MINPLUS_BUFFER_BYTES // (8 * max(1, A.shape[1] * B.shape[1])))
+        for start in range(0, A.shape[0], rows):
+            block = A[start:start + rows]
+            result[start:start + rows] = np.min(block[:, :, None] + B[None, :, :], axis=1)
+        return result
+    raise ValueError(f"Unknown semiring {semiring}")
 
-def Mn(p):
-    matrix = [
-        [0, 1, 1, 1, 1, 0, 0, 0, 0, 0],
-        [1, 0, 0, 1, 0, 1, 0, 0, 0, 0],
-        [1, 0, 0, 0, 0, 1, 1, 0, 0, 0],
-        [1, 1, 0, 0, 1, 0, 0, 0, 1, 0],
-        [1, 0, 0, 1, 0, 0, 0, 1, 1, 0],
-        [0, 1, 1, 0, 0, 0, 1, 0, 1, 1],
-        [0, 0, 1, 0, 0, 1, 0, 0, 0, 1],
-        [0, 0, 0, 0, 1, 0, 0, 0, 1, 0],
-        [0, 0, 0, 1, 1, 1, 0, 1, 0, 0],
-        [0, 0, 0, 0, 0, 1, 1, 0, 0, 0]
-    ]
-    result = [[1 if i == j else 0 for j in range(10)] for i in range(10)]
-    for _ in range(p):
-        result = MxM(result, matrix)
+
+def matrix_power(matrix, p, semiring='count'):
+    """
+    Raise a matrix to the power p by repeated squaring (O(log p) products).
+
+    Args:
+        matrix: Square matrix (list of lists or NumPy array)
+        p: Non-negative exponent
+        semiring: 'count', 'bool' or 'minplus'
+
+    Returns:
+        numpy.ndarray: matrix^p in the semiring
+    """
+    if p < 0:
+        raise ValueError("p must be non-negative")
+    base = np.asarray(matrix)
+    result = identity(base.shape[0], semiring, base.dtype)
+    while p:
+        if p & 1:
+            result = MxM(result, base, semiring)
+        p >>= 1
+        if p:
+            base = MxM(base, base, semiring)
     return result
 
+
+def Mn(p, matrix=None):
+    """Number of walks of length p (original 10-city matrix by default)."""
+    return matrix_power(np.array(MATRICE if matrix is None else matrix, dtype=object), p)
+
+
+def walk_counts(graph, p, exact=False):
+    """
+    Number of walks of exactly p hops between every pair of nodes of a Graph.
+
+    Counts grow exponentially with p: int64 products raise OverflowError
+    rather than wrap around, exact=True counts with Python integers.
+    """
+    return matrix_power(adjacency_matrix(graph, 'count', exact), p)
+
+
+def reachable_within(graph, k):
+    """Boolean matrix: [i][j] is True when j is reachable from i in at most k hops."""
+    matrix = adjacency_matrix(graph, 'bool')
+    np.fill_diagonal(matrix, True)
+    return matrix_power(matrix, k, 'bool')
+
+
+def hop_bounded_latencies(graph, k):
+    """Shortest latency between every pair using at most k hops (inf if none)."""
+    return matrix_power(adjacency_matrix(graph, 'minplus'), k, 'minplus')
+
+
 def printm(Matrice):
     for row in Matrice:
-        print(' '.join(f'{val:3d}' for val in row))
+        print(' '.join(f'{val:>3}' for val in row))
+
 
-n=int(input("Entre la puissance n = ")) 
-printm(Mn(n))
\ No newline at end of file
+if __name__ == "__main__":
+    n = int(input("Entre la puissance n = "))
+    printm(Mn(n))
@@ -0,0 +1,200 @@
+"""
+All-sources shortest paths module.
+Runs one shortest-path tree per source across a process pool. Workers write
+their rows straight into n x n NumPy matrices backed by
+multiprocessing.shared_memory (float32 distances, int32 predecessors and/or
+int32 next hops): no result is pickled back, and the parent
+reads the finished tables through zero-copy views.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from compact_graph import CompactGraph
+from graph_algorithms import shortest_path_tree
+
+NO_NODE = -1
+
+# Worker-side topology and attached matrices, installed once per worker
+_STATE = None
+
+
+class SharedTables:
+    """n x n matrices in shared memory blocks, indexed by node id."""
+
+    def __init__(self, names, distance_dtype=np.float32, predecessors=True, next_hops=False, _blocks=None):
+        """
+        Allocate the tables (or attach to existing blocks by name).
+
+        Args:
+            names: List of node names, position = node id
+            distance_dtype: dtype of the distance matrix (inf when unreachable)
+            predecessors: Keep a predecessor matrix (row s: tree of source s)
+            next_hops: Keep a first-hop matrix
+        """
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        n = len(names)
+        layout = {'distances': np.dtype(distance_dtype)}
+        if predecessors:
+            layout['predecessors'] = np.dtype(np.int32)
+        if next_hops:
+            layout['next_hops'] = np.dtype(np.int32)
+
+        self._owner = _blocks is None
+        self._blocks = {}
+        for key, dtype in layout.items():
+            if self._owner:
+                # Zero-sized blocks are rejected: keep at least one byte
+                block = shared_memory.SharedMemory(create=True, size=max(1, n * n * dtype.itemsize))
+            else:
+                block = shared_memory.SharedMemory(name=_blocks[key])
+            self._blocks[key] = block
+            setattr(self, key, np.ndarray((n, n), dtype=dtype, buffer=block.buf))
+
+        if self._owner:
+            self.distances.fill(np.inf)
+            for key in layout:
+                if key != 'distances':
+                    getattr(self, key).fill(NO_NODE)
+
+    def block_names(self):
+        """Shared memory block name of each matrix (to attach from another process)."""
+        return {key: block.name for key, block in self._blocks.items()}
+
+    def fill_row(self, compact, source):
+        """Compute the tree of one source and write its rows."""
+        L, P, order = shortest_path_tree(compact, source)
+        self.distances[source] = L
+        if 'predecessors' in self._blocks:
+            self.predecessors[source] = [p if p is not None else NO_NODE for p in P]
+        if 'next_hops' in self._blocks:
+            self.next_hops[source] = first_hops(P, order, source)
+
+    def latency(self, source, destination):
+        """Return the shortest latency source -> destination (inf if unreachable)."""
+        return float(self.distances[self.index[source], self.index[destination]])
+
+    def path(self, source, destination):
+        """
+        Walk the predecessor row of source back from destination (or follow
+        next hops when only those are kept).
+
+        Returns:
+            list: Path from source to destination, or empty list if no path exists
+        """
+        s, v = self.index[source], self.index[destination]
+        if 'predecessors' not in self._blocks:
+            if self.next_hops[s, v] == NO_NODE:
+                return []
+            path = [s]
+            while path[-1] != v:
+                path.append(int(self.next_hops[path[-1], v]))
+            return [self.names[i] for i in path]
+
+        row = self.predecessors[s]
+        if row[v] == NO_NODE:
+            return []
+        path = [v]
+        while v != s:
+            v = int(row[v])
+            path.append(v)
+        return [self.names[i] for i in reversed(path)]
+
+    def unlink(self):
+        """
+        Remove the block names once no other process needs to attach.
+
+        The memory is then freed with the last mapping, even if close() is
+        never called.
+        """
+        if self._owner:
+            for block in self._blocks.values():
+                block.unlink()
+            self._owner = False
+
+    def close(self):
+        """Drop the views and release the blocks (freed when the owner closes)."""
+        for key in list(self._blocks):
+            delattr(self, key)
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def first_hops(P, order, source):
+    """First hop from source towards every node, read off a tree in settle order."""
+    hops = [NO_NODE] * len(P)
+    hops[source] = source
+    for node in order[1:]:
+        parent = P[node]
+        hops[node] = node if parent == source else hops[parent]
+    return hops
+
+
+def _init_worker(compact, distance_dtype, predecessors, next_hops, blocks):
+    global _STATE
+    _STATE = (compact, SharedTables(compact.names, distance_dtype, predecessors, next_hops, _blocks=blocks))
+
+
+def _fill(sources):
+    compact, tables = _STATE
+    for source in range(*sources):
+        tables.fill_row(compact, source)
+    return sources[1] - sources[0]
+
+
+def all_sources(graph, processes=None, chunksize=None, distance_dtype=np.float32, predecessors=True,
+                next_hops=False):
+    """
+    Shortest-path trees from every node, written into shared matrices.
+
+    Args:
+        graph: Graph to route on (non-negative weights)
+        processes: Worker count (defaults to the CPU count); 1 runs inline
+        chunksize: Consecutive sources per task (default: about 8 tasks per worker)
+        distance_dtype: np.float32 (default) or np.float64 for exact float latencies
+        predecessors: Fill the predecessor matrix
+        next_hops: Fill a first-hop matrix
+
+    Returns:
+        SharedTables: Owner of the matrices; close() it to free the memory
+    """
+    compact = graph.freeze()
+    n = compact.num_nodes
+    # Plain lists: picklable whatever backs the graph, and fast to index
+    compact = CompactGraph(list(compact.names), list(compact.offsets),
+                           list(compact.targets), list(compact.weights))
+    tables = SharedTables(compact.names, distance_dtype, predecessors, next_hops)
+
+    processes = processes or os.cpu_count()
+    chunksize = chunksize or max(1, n // (8 * processes))
+    tasks = [(start, min(start + chunksize, n)) for start in range(0, n, chunksize)]
+
+    try:
+        if processes == 1 or len(tasks) <= 1:
+            for start, end in tasks:
+                for source in range(start, end):
+                    tables.fill_row(compact, source)
+            return tables
+
+        with multiprocessing.Pool(min(processes, len(tasks)), initializer=_init_worker,
+                                  initargs=(compact, distance_dtype, predecessors, next_hops,
+                                            tables.block_names())) as pool:
+            for _ in pool.imap_unordered(_fill, tasks):
+                pass
+    except BaseException:
+        tables.close()
+        raise
+    return tables
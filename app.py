@@ -3,10 +3,17 @@ Streamlit Application - Plus Court Chemin avec Simulation de Pannes
 Projet Recherche Opérationnelle
 """
 
+import os
+import time
+
 import streamlit as st
 import networkx as nx
-import matplotlib.pyplot as plt
-from graph_algorithms import Graph
+from graph_algorithms import Graph, QueryStats
+from connectivity import ConnectivityIndex
+from path_cache import PathCache
+from routing_store import load_or_build, store_path, topology_hash
+from topology_io import load_topology
+from network_render import NetworkRenderer
 
 # Page configuration
 st.set_page_config(
@@ -75,16 +82,57 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def load_graph():
-    """Load the graph (cache removed to ensure latest version is used)"""
+    """Load the graph, reloaded whenever the topology file changes.
+    
+    TOPOLOGY_PATH may point to a CSV, JSON Lines or snapshot topology;
+    otherwise the built-in Moroccan network is used."""
+    topology_path = os.environ.get("TOPOLOGY_PATH")
+    stamp = os.path.getmtime(topology_path) if topology_path else None
+    return _load_graph(topology_path, stamp)
+
+@st.cache_resource(max_entries=4)
+def _load_graph(topology_path, stamp):
+    if topology_path:
+        return load_topology(topology_path)
     return Graph()
 
-def get_fixed_positions():
-    """Positions optimisées des villes"""
-    return {
-        'C': (-5, 0), 'R': (-3, 2.5), 'M': (-3, -5.5), 'T': (-4, 4.5),
-        'A': (1, -5), 'F': (2, 0), 'H': (3, 2.5), 'B': (3.5, -6.2),
-        'S': (2, -3.5), 'O': (5, 0)
-    }
+# On-disk routing tables, filed by topology hash (mapped at startup when current),
+# in the user cache directory rather than the source tree
+ROUTING_STORE = os.environ.get("ROUTING_STORE", os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "sdwan-ro", "routing_tables"))
+# Above this size the n x n tables are not worth their disk and memory footprint
+ROUTING_TABLE_MAX_NODES = 5000
+
+@st.cache_resource(max_entries=4)
+def get_routing_table(_graph, version):
+    """All-pairs routing table for one topology version, mapped from the store or built once in parallel"""
+    return load_or_build(_graph, ROUTING_STORE, 'parallel')[0]
+
+@st.cache_resource(max_entries=4)
+def get_routing_table_path(_graph, version):
+    """Store file of the routing table of one topology version"""
+    return store_path(ROUTING_STORE, topology_hash(_graph))
+
+@st.cache_resource(max_entries=4)
+def get_path_cache(_graph, version):
+    """Shortest-path trees shared across reruns and sessions for one topology version"""
+    return PathCache(_graph)
+
+@st.cache_resource(max_entries=4)
+def get_connectivity_index(_graph, version):
+    """Bridge/articulation index shared across reruns for one topology version"""
+    return ConnectivityIndex(_graph)
+
+def get_fixed_positions(graph_obj):
+    """Positions des villes (coordonnées du graphe, sinon disposition automatique)"""
+    positions = graph_obj.get_positions()
+    missing = [node for node in graph_obj.get_nodes() if node not in positions]
+    if missing:
+        layout = nx.Graph()
+        layout.add_nodes_from(graph_obj.get_nodes())
+        layout.add_edges_from((src, dest) for src, dest, _ in graph_obj.get_edges())
+        positions = nx.spring_layout(layout, pos=positions or None, fixed=list(positions) or None, seed=42)
+    return positions
 
 def get_edge_styles():
     """Styles optimisés pour les liens"""
@@ -108,142 +156,35 @@ def get_edge_styles():
         ('H', 'O'): 'arc3,rad=0.05',
     }
 
+@st.cache_resource(max_entries=4)
+def get_renderer(_graph, version):
+    """Static network layer drawn once per topology version"""
+    return NetworkRenderer(_graph, get_fixed_positions(_graph), get_edge_styles())
+
 def create_network_graph(graph_obj, path, disabled_links, disabled_cities):
-    """Create graph with failures simulation - keeping disabled elements visible but grayed out."""
-    G = nx.Graph()
-    seen_edges = set()
-    
-    # Add ALL edges (including disabled ones)
-    for source, dest, weight in graph_obj.get_edges():
-        edge_pair = tuple(sorted([source, dest]))
-        if edge_pair not in seen_edges:
-            seen_edges.add(edge_pair)
-            # Mark if edge is disabled
-            is_disabled = (source, dest) in disabled_links or (dest, source) in disabled_links or source in disabled_cities or dest in disabled_cities
-            G.add_edge(source, dest, weight=weight, disabled=is_disabled)
-    
-    fig, ax = plt.subplots(figsize=(18, 10))
-    pos = get_fixed_positions()
-    edge_styles = get_edge_styles()
-    
-    # All nodes
-    all_nodes = list(pos.keys())
-    
-    # Node colors
-    node_colors = []
-    node_sizes = []
-    for node in all_nodes:
-        if node in disabled_cities:
-            node_colors.append('#CCCCCC')  # Gray for disabled
-            node_sizes.append(2200)
-        elif path and node in path:
-            if node == path[0]:
-                node_colors.append('#4CAF50')
-                node_sizes.append(2800)
-            elif node == path[-1]:
-                node_colors.append('#F44336')
-                node_sizes.append(2800)
-            else:
-                node_colors.append('#FFC107')
-                node_sizes.append(2400)
-        else:
-            node_colors.append('#2196F3')
-            node_sizes.append(2200)
-    
-    # Draw all nodes
-    nx.draw_networkx_nodes(all_nodes, pos, node_color=node_colors, node_size=node_sizes, alpha=0.95, ax=ax)
-    
-    # Path edges
-    path_edges = [(path[i], path[i+1]) for i in range(len(path)-1)] if path else []
-    
-    # Draw edges - separate active and disabled
-    active_edges = []
-    disabled_edges = []
-    
-    for edge in G.edges(data=True):
-        if edge[2].get('disabled', False):
-            disabled_edges.append((edge[0], edge[1]))
-        else:
-            active_edges.append((edge[0], edge[1]))
-    
-    # Draw disabled edges first (grayed out with dashed lines)
-    for edge in disabled_edges:
-        connection_style = edge_styles.get(edge, edge_styles.get((edge[1], edge[0]), 'arc3,rad=0.1'))
-        nx.draw_networkx_edges(G, pos, edgelist=[edge], edge_color='#D3D3D3', 
-                              width=2, alpha=0.4, ax=ax, connectionstyle=connection_style,
-                              style='dashed')
-    
-    # Draw active edges
-    for edge in active_edges:
-        is_path = edge in path_edges or (edge[1], edge[0]) in path_edges
-        color = '#4CAF50' if is_path else '#999999'
-        width = 6 if is_path else 2.5
-        alpha = 0.85 if is_path else 0.55
-        
-        connection_style = edge_styles.get(edge, edge_styles.get((edge[1], edge[0]), 'arc3,rad=0.1'))
-        nx.draw_networkx_edges(G, pos, edgelist=[edge], edge_color=color, 
-                              width=width, alpha=alpha, ax=ax, connectionstyle=connection_style)
-    
-    # Labels for all nodes
-    nx.draw_networkx_labels(G, pos, font_size=17, font_weight='bold', font_color='white', ax=ax)
-    
-    # Edge labels - show red X for disabled, weight for active
-    edge_labels = {}
-    for edge in G.edges(data=True):
-        edge_key = (edge[0], edge[1])
-        if edge[2].get('disabled', False):
-            edge_labels[edge_key] = 'X'  # X for disabled links
-        else:
-            edge_labels[edge_key] = edge[2]['weight']
-    
-    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=14, font_color='#d32f2f',
-                                 font_weight='bold', ax=ax,
-                                 bbox=dict(boxstyle='round,pad=0.4', facecolor='white', alpha=0.85))
-    
-    # Draw red X on disabled cities using text 'X'
-    for node in disabled_cities:
-        if node in pos:
-            x, y = pos[node]
-            ax.text(x, y, 'X', fontsize=32, ha='center', va='center', 
-                   color='red', weight='bold', zorder=1000)
-    
-    ax.set_title("Réseau de Villes - Plus Court Chemin", fontsize=20, fontweight='bold', pad=25, color='#1f77b4')
-    
-    # VERSION 1: Legend at absolute bottom left - fixed coordinates, no background box
-    legend_x = -6.0
-    legend_y_start = -7.5
-    
-    # Legend items - one per row
-    legend_items = [
-        {'color': '#4CAF50', 'text': 'Départ'},
-        {'color': '#F44336', 'text': 'Arrivée'},
-        {'color': '#FFC107', 'text': 'Intermédiaires'},
-        {'color': '#2196F3', 'text': 'Autres'},
-        {'color': '#CCCCCC', 'text': 'Hors service'},
-        {'color': '#dc3545', 'text': 'En panne', 'is_x': True}
-    ]
-    
-    # Draw legend items directly without background box
-    for i, item in enumerate(legend_items):
-        y_pos = legend_y_start + (i * 0.42)
-        
-        if item.get('is_x', False):
-            ax.text(legend_x, y_pos, 'X', fontsize=16, ha='left', va='center',
-                   color=item['color'], weight='bold', zorder=1000,
-                   bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8))
-            ax.text(legend_x + 0.3, y_pos, item['text'], fontsize=13,
-                   ha='left', va='center', color='#333333', zorder=1000)
+    """Image of the network with the path and failures drawn over the cached base layer."""
+    renderer = get_renderer(graph_obj, graph_obj.version)
+    return renderer.render(path, disabled_links, disabled_cities)
+
+def show_diagnostics(stats, path_cache):
+    """Panneau de diagnostic de la requête dans la barre latérale"""
+    with st.sidebar.expander("🩺 Diagnostics", expanded=True):
+        if stats.algorithm == 'routing_table':
+            st.caption("Réponse lue dans la table de routage")
+        elif stats.cached:
+            st.caption("Arbre servi depuis le cache")
         else:
-            ax.plot(legend_x + 0.1, y_pos, 'o', color=item['color'], 
-                   markersize=11, markeredgewidth=0, zorder=1000)
-            ax.text(legend_x + 0.3, y_pos, item['text'], fontsize=11,
-                   ha='left', va='center', color='#333333', zorder=1000)
-    
-    ax.axis('off')
-    ax.set_xlim(-6.2, 6)
-    ax.set_ylim(-7.8, 5.5)
-    plt.tight_layout(pad=0)
-    return fig
+            st.caption(f"Algorithme : {stats.algorithm}")
+        col1, col2 = st.columns(2)
+        col1.metric("Nœuds fixés", stats.nodes_settled if stats.nodes_settled is not None else "-")
+        col2.metric("Arcs relâchés", stats.edges_relaxed if stats.edges_relaxed is not None else "-")
+        col1.metric("Tas push", stats.heap_pushes if stats.heap_pushes is not None else "-")
+        col2.metric("Tas pop", stats.heap_pops if stats.heap_pops is not None else "-")
+        if stats.seconds is not None:
+            col1.metric("Calcul", f"{stats.seconds * 1000:.3f} ms")
+        if stats.reconstruct_seconds is not None:
+            col2.metric("Chemin", f"{stats.reconstruct_seconds * 1000:.3f} ms")
+        st.json({'query': stats.as_dict(), 'cache': path_cache.stats()}, expanded=False)
 
 def main():
     st.markdown('<div class="main-header">Plus Court Chemin</div>', unsafe_allow_html=True)
@@ -263,9 +204,9 @@ def main():
         display_to_node = {f"{city_names[code]} ({code})": code for code in nodes}
         
         source_display = st.selectbox("🟢 Départ", options=display_options,
-                                     index=display_options.index(node_to_display['C']))
+                                     index=display_options.index(node_to_display.get('C', display_options[0])))
         destination_display = st.selectbox("🔴 Arrivée", options=display_options,
-                                          index=display_options.index(node_to_display['M']))
+                                          index=display_options.index(node_to_display.get('M', display_options[-1])))
         
         source = display_to_node[source_display]
         destination = display_to_node[destination_display]
@@ -292,6 +233,19 @@ def main():
             disabled_links = [(src, dest) for src, dest, _ in disabled_links_display]
         
         run_button = st.button("Calculer", type="primary", use_container_width=True)
+        
+        diagnostics = st.checkbox("🩺 Diagnostics", value=False, key="diagnostics",
+                                  help="Compteurs et temps de la dernière requête")
+        
+        # The all-pairs table is only built on request: n x n entries on disk
+        routing_ready = False
+        if len(nodes) <= ROUTING_TABLE_MAX_NODES:
+            routing_ready = os.path.exists(get_routing_table_path(graph, graph.version))
+            if not routing_ready and st.button("🗺️ Construire la table de routage", use_container_width=True,
+                                               help="Précalcule toutes les paires pour des réponses instantanées"):
+                with st.spinner("Construction de la table de routage..."):
+                    get_routing_table(graph, graph.version)
+                routing_ready = True
     
     # Main content - Always show graph
     if run_button:
@@ -299,23 +253,39 @@ def main():
             st.warning("⚠️ La ville de départ et d'arrivée sont identiques !")
             graph_col = st.container()
         else:
-            # Use original graph if no failures, otherwise create modified graph
-            if disabled_cities or disabled_links:
-                # Create modified graph excluding failures
-                modified_graph = Graph()
-                modified_graph.graph = {node: [] for node in nodes}
-                
-                for src, dest, weight in graph.get_edges():
-                    # Check both directions since graph is bidirectional
-                    if src not in disabled_cities and dest not in disabled_cities and (src, dest) not in disabled_links and (dest, src) not in disabled_links:
-                        modified_graph.graph[src].append((dest, weight))
-                
-                distances, predecessors = modified_graph.dijkstra(source)
-                path = modified_graph.reconstruct_path(predecessors, source, destination)
+            connectivity = get_connectivity_index(graph, graph.version)
+            if (disabled_cities or disabled_links) and not connectivity.is_reachable(
+                    source, destination, disabled_links, disabled_cities):
+                # The failures partition the network: no shortest-path run needed
+                path = []
+            elif not (disabled_cities or disabled_links) and routing_ready:
+                # Intact network: plain lookup in the stored routing table
+                started = time.perf_counter()
+                table = get_routing_table(graph, graph.version)
+                path = table.path(source, destination)
+                latency = table.latency(source, destination)
+                if diagnostics:
+                    stats = QueryStats()
+                    stats.algorithm, stats.source, stats.target = 'routing_table', source, destination
+                    stats.seconds = time.perf_counter() - started
+                    stats.path_length = len(path)
+                    show_diagnostics(stats, get_path_cache(graph, graph.version))
+            elif not (disabled_cities or disabled_links):
+                # Intact network without a routing table: goal-directed single query
+                stats = QueryStats() if diagnostics else None
+                latency, path, _ = graph.astar(source, destination, stats=stats)
+                if diagnostics:
+                    show_diagnostics(stats, get_path_cache(graph, graph.version))
             else:
-                # No failures - use original graph
-                distances, predecessors = graph.dijkstra(source)
-                path = graph.reconstruct_path(predecessors, source, destination)
+                # Shortest-path tree for this source and failure set, cached across reruns
+                path_cache = get_path_cache(graph, graph.version)
+                stats = QueryStats() if diagnostics else None
+                distances, predecessors = path_cache.shortest_path_tree(
+                    source, disabled_cities, disabled_links, stats=stats)
+                path = graph.reconstruct_path(predecessors, source, destination, stats=stats)
+                latency = distances[destination]
+                if diagnostics:
+                    show_diagnostics(stats, path_cache)
             
             if not path:
                 col1, col2 = st.columns([3, 1])
@@ -328,7 +298,7 @@ def main():
                 col1, col2 = st.columns([3, 1])
                 with col2:
                     st.success(f"Chemin optimal")
-                    st.metric("Latence", f"{distances[destination]} ms")
+                    st.metric("Latence", f"{latency} ms")
                     st.metric("Étapes", len(path) - 1)
                     
                     path_full_names = [city_names[node] for node in path]
@@ -346,10 +316,9 @@ def main():
                 with graph_placeholder.container():
                     st.markdown("<br>" * 8, unsafe_allow_html=True)
                     with st.spinner('Calcul du chemin et génération du graphe...'):
-                        fig = create_network_graph(graph, path, disabled_links, disabled_cities)
+                        image = create_network_graph(graph, path, disabled_links, disabled_cities)
                     graph_placeholder.empty()
-                st.pyplot(fig, use_container_width=False)
-                plt.close()
+                st.image(image, use_container_width=True)
     
     else:
         col1, col2 = st.columns([3, 1])
@@ -360,10 +329,9 @@ def main():
             with graph_placeholder.container():
                 st.markdown("<br>" * 8, unsafe_allow_html=True)
                 with st.spinner('Chargement du graphe...'):
-                    fig = create_network_graph(graph, None, set(), set())
+                    image = create_network_graph(graph, None, set(), set())
                 graph_placeholder.empty()
-            st.pyplot(fig, use_container_width=False)
-            plt.close()
+            st.image(image, use_container_width=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,443 @@
+"""
+Network availability module.
+Monte Carlo estimation of how often site pairs stay connected when links and
+cities fail independently with given probabilities, and of their expected
+latency when they do. Failures are drawn in large NumPy batches; the
+connected components of every sample of a batch are found at once, by
+cutting a spanning forest at the failed links and merging the fragments
+with vectorized label propagation and pointer jumping. Latencies only need
+work when a sample breaks a baseline route, and then only the part of the
+source's shortest-path tree below the failures is recomputed. Batches are
+spread across a process pool; results come with Wilson confidence intervals.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+from statistics import NormalDist
+
+import numpy as np
+
+from batch_queries import BatchState
+from dynamic_sp import repair_subtree
+from graph_algorithms import Graph, shortest_path_tree
+
+INF = float('inf')
+
+# Failure patterns whose repairs a model keeps
+PATTERN_CACHE_SIZE = 4096
+
+# Sampling model of the worker processes, installed once per worker
+_STATE = None
+
+
+class AvailabilityModel:
+    """Links, failure probabilities, monitored pairs and their baseline routes."""
+
+    def __init__(self, graph, pairs, link_failure=0.01, city_failure=0.0):
+        """
+        Args:
+            graph: Graph to evaluate (non-negative weights; links undirected)
+            pairs: (source, destination) pairs to monitor
+            link_failure: Failure probability of every link, or a dict
+                {(a, b): probability} (missing links never fail)
+            city_failure: Failure probability of every city, or a dict
+                {city: probability} (missing cities never fail)
+        """
+        self.state = BatchState(graph)
+        names, index = self.state.names, self.state.index
+        n = len(names)
+
+        links = sorted(tuple(sorted(link)) for link in self.state.link_edges if len(link) == 2)
+        self.link_a = np.array([a for a, _ in links], dtype=np.int64)
+        self.link_b = np.array([b for _, b in links], dtype=np.int64)
+        self.links = links
+        link_number = {link: i for i, link in enumerate(links)}
+
+        if isinstance(link_failure, dict):
+            self.link_p = np.zeros(len(links))
+            for (a, b), p in link_failure.items():
+                self.link_p[link_number[tuple(sorted((index[a], index[b])))]] = p
+        else:
+            self.link_p = np.full(len(links), float(link_failure))
+        if isinstance(city_failure, dict):
+            self.city_p = np.zeros(n)
+            for city, p in city_failure.items():
+                self.city_p[index[city]] = p
+        else:
+            self.city_p = np.full(n, float(city_failure))
+
+        for source, destination in pairs:
+            for node in (source, destination):
+                if node not in index:
+                    raise ValueError(f"Node {node} not in graph")
+        self.pairs = [(index[s], index[d]) for s, d in pairs]
+        self.pair_s = np.array([s for s, _ in self.pairs], dtype=np.int64)
+        self.pair_d = np.array([d for _, d in self.pairs], dtype=np.int64)
+
+        # Spanning forest of the intact network, by BFS depth level
+        neighbors = [[] for _ in range(n)]
+        for k, (a, b) in enumerate(links):
+            neighbors[a].append((b, k))
+            neighbors[b].append((a, k))
+        tree_parent = [None] * n
+        tree_link = [-1] * n
+        depth = [0] * n
+        levels = []
+        for root in range(n):
+            if tree_parent[root] is not None:
+                continue
+            tree_parent[root] = root
+            frontier = [root]
+            while frontier:
+                following = []
+                for u in frontier:
+                    for v, k in neighbors[u]:
+                        if tree_parent[v] is None:
+                            tree_parent[v], tree_link[v], depth[v] = u, k, depth[u] + 1
+                            following.append(v)
+                if following:
+                    level = depth[following[0]]
+                    if len(levels) < level:
+                        levels.append([])
+                    levels[level - 1].extend(following)
+                frontier = following
+        self.tree_parent = np.array(tree_parent, dtype=np.int64)
+        self.levels = [np.array(level, dtype=np.int64) for level in levels]
+        self.roots = np.array([v for v in range(n) if tree_parent[v] == v], dtype=np.int64)
+        self.children = np.array([v for v in range(n) if tree_parent[v] != v], dtype=np.int64)
+        self.children_link = np.array([tree_link[v] for v in self.children], dtype=np.int64)
+        in_tree = np.zeros(len(links), dtype=bool)
+        in_tree[self.children_link] = True
+        self.cross_links = np.flatnonzero(~in_tree)
+
+        # Link number of every edge, and source node of every edge
+        compact = self.state.compact
+        self.edge_sources = []
+        self.edge_link = []
+        for u in range(n):
+            for k in range(compact.offsets[u], compact.offsets[u + 1]):
+                v = compact.targets[k]
+                self.edge_sources.append(u)
+                self.edge_link.append(link_number[(min(u, v), max(u, v))] if u != v else -1)
+
+        self._lost = {}
+        self._repairs = {}
+
+        # Baseline shortest-path tree of every source, and the links / cities each route uses
+        self.trees = {}
+        self.base_latency = np.full(len(self.pairs), np.inf)
+        self.route_links = []
+        self.route_cities = []
+        for i, (s, d) in enumerate(self.pairs):
+            if s not in self.trees:
+                L, P, _ = shortest_path_tree(compact, s)
+                tree_children = [[] for _ in range(n)]
+                for v, u in enumerate(P):
+                    if u is not None and u != v:
+                        tree_children[u].append(v)
+                self.trees[s] = (L, P, tree_children)
+            L, P, _ = self.trees[s]
+            self.base_latency[i] = L[d]
+            route = [d]
+            while L[d] < INF and route[-1] != s:
+                route.append(P[route[-1]])
+            hops = list(zip(route[1:], route[:-1]))
+            self.route_links.append(np.array([link_number[tuple(sorted(hop))] for hop in hops], dtype=np.int64))
+            self.route_cities.append(np.array(route if L[d] < INF else [s, d], dtype=np.int64))
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def sample(self, rng, size):
+        """
+        Draw failure samples.
+
+        Returns:
+            tuple: (links_down bool (size, links), cities_down bool (size, n))
+        """
+        links_down = rng.random((size, len(self.links)), dtype=np.float32) < self.link_p
+        cities_down = rng.random((size, len(self.city_p)), dtype=np.float32) < self.city_p
+        return links_down, cities_down
+
+    def components(self, links_down, cities_down):
+        """
+        Connected-component label of every node in every sample.
+
+        The spanning forest of the intact network is cut at its failed
+        edges, one depth level at a time for all samples together; each node
+        is labelled with the top of its fragment. Only the live links
+        outside the forest that join two fragments are left to merge: each
+        round hooks the larger fragment root under the smaller one, then
+        pointer jumping flattens every tree.
+
+        Returns:
+            np.ndarray: (samples, n) labels, equal within a component
+        """
+        size, n = cities_down.shape
+        children, parents = self.children, self.tree_parent[self.children]
+        broken = np.zeros((size, n), dtype=bool)
+        broken[:, children] = links_down[:, self.children_link] | cities_down[:, children] | cities_down[:, parents]
+
+        labels = np.empty((size, n), dtype=np.int64)
+        labels[:, self.roots] = self.roots
+        for level in self.levels:
+            labels[:, level] = np.where(broken[:, level], level, labels[:, self.tree_parent[level]])
+
+        a, b = self.link_a[self.cross_links], self.link_b[self.cross_links]
+        live = ~links_down[:, self.cross_links] & ~cities_down[:, a] & ~cities_down[:, b]
+        merging = live & (labels[:, a] != labels[:, b])
+        rows, link_ids = np.nonzero(merging)
+        if not len(rows):
+            return labels
+
+        # Union of fragments, fragment ids offset by row
+        offsets = np.arange(size, dtype=np.int64)[:, None] * n
+        ends_a, ends_b = rows * n + labels[rows, a[link_ids]], rows * n + labels[rows, b[link_ids]]
+        roots = np.arange(size * n, dtype=np.int64)
+        while len(ends_a):
+            la, lb = roots[ends_a], roots[ends_b]
+            differ = la != lb
+            if not differ.any():
+                break
+            ends_a, ends_b, la, lb = ends_a[differ], ends_b[differ], la[differ], lb[differ]
+            np.minimum.at(roots, np.maximum(la, lb), np.minimum(la, lb))
+            while True:
+                jumped = roots[roots]
+                if np.array_equal(jumped, roots):
+                    break
+                roots = jumped
+        return roots[labels + offsets] - offsets
+
+    def evaluate(self, rng, size):
+        """
+        Run one batch of samples.
+
+        Returns:
+            tuple: per-pair arrays (connected counts, latency sums, latency
+                sums of squares) over the connected samples
+        """
+        links_down, cities_down = self.sample(rng, size)
+        labels = self.components(links_down, cities_down)
+        s, d = self.pair_s, self.pair_d
+        connected = (labels[:, s] == labels[:, d]) & ~cities_down[:, s] & ~cities_down[:, d]
+
+        latency_sum = np.zeros(len(self.pairs))
+        latency_squares = np.zeros(len(self.pairs))
+        rerouted = {}
+        for i in range(len(self.pairs)):
+            broken = links_down[:, self.route_links[i]].any(axis=1) | cities_down[:, self.route_cities[i]].any(axis=1)
+            kept = int((connected[:, i] & ~broken).sum())
+            if kept:
+                latency_sum[i] += kept * self.base_latency[i]
+                latency_squares[i] += kept * self.base_latency[i] ** 2
+            for sample in np.flatnonzero(connected[:, i] & broken).tolist():
+                rerouted.setdefault(sample, []).append(i)
+
+        # Samples that break a baseline route: repair the source's tree below the failures
+        for sample, pair_numbers in rerouted.items():
+            down_links = set(np.flatnonzero(links_down[sample]).tolist())
+            down_cities = set(np.flatnonzero(cities_down[sample]).tolist())
+            by_source = {}
+            for i in pair_numbers:
+                by_source.setdefault(self.pairs[i][0], []).append(i)
+            for source, numbers in by_source.items():
+                distances = self._reroute(source, down_links, down_cities, {self.pairs[i][1] for i in numbers})
+                for i in numbers:
+                    latency = distances[self.pairs[i][1]]
+                    latency_sum[i] += latency
+                    latency_squares[i] += latency * latency
+
+        return connected.sum(axis=0), latency_sum, latency_squares
+
+    def _reroute(self, source, down_links, down_cities, destinations):
+        """
+        Shortest distances to some destinations under failures, recomputing
+        only the part of the baseline tree below the failed elements.
+
+        Only the failed tree links and cities, and the failed links touching
+        the cut-off part, change that part: repairs are cached on them, so
+        the common single-failure patterns are solved once per source.
+
+        Returns:
+            dict: {destination: latency} (INF if cut off)
+        """
+        L, P, tree_children = self.trees[source]
+        links = self.links
+
+        # Tops of the cut-off subtrees
+        cities = frozenset(c for c in down_cities if L[c] < INF)
+        tops = list(cities)
+        for k in down_links:
+            a, b = links[k]
+            if P[b] == a:
+                tops.append(b)
+            elif P[a] == b:
+                tops.append(a)
+        tops = frozenset(tops)
+
+        lost = self._lost.get((source, tops))
+        if lost is None:
+            lost, stack = set(), list(tops)
+            while stack:
+                v = stack.pop()
+                if v not in lost:
+                    lost.add(v)
+                    stack.extend(tree_children[v])
+            if len(self._lost) >= PATTERN_CACHE_SIZE:
+                self._lost.clear()
+            self._lost[(source, tops)] = lost
+
+        touching = frozenset(k for k in down_links if links[k][0] in lost or links[k][1] in lost)
+        key = (source, tops, cities, touching)
+        distance = self._repairs.get(key)
+        if distance is None:
+            distance = self._repair(L, lost - cities, cities, touching)
+            if len(self._repairs) >= PATTERN_CACHE_SIZE:
+                self._repairs.clear()
+            self._repairs[key] = distance
+        return {v: distance.get(v, INF) if v in lost else L[v] for v in destinations}
+
+    def _repair(self, L, lost, down_cities, down_links):
+        """Distances of the cut-off nodes that the intact tree reaches again."""
+        compact, edge_sources, edge_link = self.state.compact, self.edge_sources, self.edge_link
+        repaired = repair_subtree(lost, L, compact.weights, compact.offsets, compact.targets, self.state.in_edges,
+                                  edge_sources,
+                                  lambda k: edge_sources[k] not in down_cities and edge_link[k] not in down_links)
+        return {v: d for v, (d, _, _) in repaired.items()}
+
+
+def _init_worker(model):
+    global _STATE
+    _STATE = model
+
+
+def _run_batches(job):
+    seed, batches, batch_size = job
+    return _accumulate(_STATE, np.random.default_rng(seed), batches, batch_size)
+
+
+def _accumulate(model, rng, batches, batch_size):
+    totals = [np.zeros(len(model.pairs)) for _ in range(3)]
+    for size in batches:
+        for total, part in zip(totals, model.evaluate(rng, size)):
+            total += part
+    return totals
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+    Wilson score interval of a binomial proportion.
+
+    Returns:
+        tuple: (low, high), (0, 1) when there are no trials
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def estimate_availability(graph, pairs=None, link_failure=0.01, city_failure=0.0, samples=100000,
+                          batch_size=4096, processes=None, seed=None, confidence=0.95):
+    """
+    Monte Carlo availability and expected latency of site pairs.
+
+    Args:
+        graph: Graph to evaluate (non-negative weights; links undirected)
+        pairs: (source, destination) pairs (default: every unordered pair)
+        link_failure: Probability of each link being down, or a dict per link
+        city_failure: Probability of each city being down, or a dict per city
+        samples: Number of failure samples
+        batch_size: Samples drawn and evaluated together
+        processes: Worker count (defaults to the CPU count); 1 runs inline
+        seed: Seed of the sample streams (one independent stream per worker)
+        confidence: Confidence level of the intervals
+
+    Returns:
+        list: One dict per pair {'source', 'destination', 'availability',
+            'availability_ci', 'expected_latency', 'latency_ci',
+            'baseline_latency', 'samples'}; latencies are conditional on the
+            pair being connected (None if it never was)
+    """
+    if pairs is None:
+        nodes = graph.get_nodes()
+        pairs = [(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:]]
+    pairs = list(pairs)
+    model = AvailabilityModel(graph, pairs, link_failure, city_failure)
+
+    batches = [batch_size] * (samples // batch_size) + ([samples % batch_size] if samples % batch_size else [])
+    processes = min(processes or os.cpu_count(), max(1, len(batches)))
+    seeds = np.random.SeedSequence(seed).spawn(processes)
+
+    if processes == 1:
+        totals = _accumulate(model, np.random.default_rng(seeds[0]), batches, batch_size)
+    else:
+        jobs = [(seeds[w], batches[w::processes], batch_size) for w in range(processes)]
+        totals = [np.zeros(len(pairs)) for _ in range(3)]
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(model,)) as pool:
+            for part in pool.imap_unordered(_run_batches, jobs):
+                for total, value in zip(totals, part):
+                    total += value
+
+    connected, latency_sum, latency_squares = totals
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    results = []
+    for i, (source, destination) in enumerate(pairs):
+        k = int(connected[i])
+        result = {
+            'source': source,
+            'destination': destination,
+            'availability': k / samples if samples else None,
+            'availability_ci': wilson_interval(k, samples, confidence),
+            'expected_latency': None,
+            'latency_ci': None,
+            'baseline_latency': float(model.base_latency[i]) if model.base_latency[i] < INF else None,
+            'samples': samples,
+        }
+        if k:
+            mean = latency_sum[i] / k
+            variance = max(0.0, latency_squares[i] / k - mean * mean)
+            margin = z * math.sqrt(variance / k)
+            result['expected_latency'] = float(mean)
+            result['latency_ci'] = (float(mean - margin), float(mean + margin))
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo network availability (JSON Lines, one pair per line)")
+    parser.add_argument('--topology', help="CSV, JSON Lines or snapshot topology (default: built-in network)")
+    parser.add_argument('--pair', action='append', nargs=2, metavar=('SOURCE', 'DESTINATION'),
+                        help="Pair to evaluate (default: every unordered pair)")
+    parser.add_argument('--link-failure', type=float, default=0.01)
+    parser.add_argument('--city-failure', type=float, default=0.0)
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        from topology_io import load_topology
+        graph = load_topology(args.topology)
+    else:
+        graph = Graph()
+
+    results = estimate_availability(graph, args.pair, args.link_failure, args.city_failure, args.samples,
+                                    args.batch_size, args.processes, args.seed, args.confidence)
+    for result in results:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()
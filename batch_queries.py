@@ -0,0 +1,194 @@
+"""
+Batch path-query module.
+Answers many (source, destination) latency queries at once, optionally each
+with its own failure set. Queries sharing a source and failure set are
+grouped so that every shortest-path tree is computed once, and the groups
+are spread across a process pool; results stream back as they complete.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from compact_graph import CompactGraph
+from graph_algorithms import Graph, shortest_path_tree
+
+INF = float('inf')
+
+# Base topology of the worker processes, installed once per worker
+_STATE = None
+_PATHS = False
+
+
+class BatchState:
+    """Picklable base topology plus the edge lookups needed to apply failures."""
+
+    def __init__(self, graph):
+        compact = graph.freeze()
+        # Plain lists: picklable whatever backs the graph, and fast to index
+        self.compact = CompactGraph(list(compact.names), list(compact.offsets),
+                                    list(compact.targets), list(compact.weights))
+        self.names = self.compact.names
+        self.index = self.compact.index
+
+        # Edge ids per undirected link, and incoming edge ids per node
+        self.link_edges = {}
+        self.in_edges = [[] for _ in self.names]
+        for k, (u, v, _) in enumerate(self.compact.edges()):
+            self.link_edges.setdefault(frozenset((u, v)), []).append(k)
+            self.in_edges[v].append(k)
+
+    def group(self, queries):
+        """
+        Group queries by source and failure set.
+
+        Args:
+            queries: Iterable of (source, destination) or
+                (source, destination, failed_cities, failed_links) tuples
+
+        Returns:
+            list: Tasks (source id, failed city ids, failed links as id
+                pairs, [(query number, destination id), ...])
+        """
+        groups = {}
+        for number, query in enumerate(queries):
+            source, destination = query[0], query[1]
+            failed_cities = query[2] if len(query) > 2 else ()
+            failed_links = query[3] if len(query) > 3 else ()
+            for node in (source, destination, *failed_cities, *(node for link in failed_links for node in link)):
+                if node not in self.index:
+                    raise ValueError(f"Node {node} not in graph")
+
+            key = (
+                self.index[source],
+                tuple(sorted(self.index[city] for city in set(failed_cities))),
+                tuple(sorted({tuple(sorted((self.index[a], self.index[b]))) for a, b in failed_links})),
+            )
+            groups.setdefault(key, []).append((number, self.index[destination]))
+        return [key + (destinations,) for key, destinations in groups.items()]
+
+    def solve(self, task, paths=False):
+        """
+        Compute one shortest-path tree and answer every query of its group.
+
+        Returns:
+            list: One result dict per query, latency None when unreachable
+        """
+        source, failed_cities, failed_links, destinations = task
+        weights = None
+        if failed_cities or failed_links:
+            weights = list(self.compact.weights)
+            for city in failed_cities:
+                for k in self.in_edges[city]:
+                    weights[k] = INF
+            for link in failed_links:
+                for k in self.link_edges.get(frozenset(link), ()):
+                    weights[k] = INF
+
+        source_down = source in failed_cities
+        if source_down:
+            L, P = None, None
+        else:
+            # A single destination lets the search stop as soon as it is settled
+            target = destinations[0][1] if len(destinations) == 1 else -1
+            L, P, _ = shortest_path_tree(self.compact, source, target, weights)
+
+        results = []
+        for number, destination in destinations:
+            latency = None if source_down or L[destination] == INF else L[destination]
+            result = {
+                'query': number,
+                'source': self.names[source],
+                'destination': self.names[destination],
+                'latency': latency,
+            }
+            if paths:
+                result['path'] = self._path(P, source, destination) if latency is not None else []
+            results.append(result)
+        return results
+
+    def _path(self, P, source, destination):
+        path = [destination]
+        while path[-1] != source:
+            path.append(P[path[-1]])
+        return [self.names[v] for v in reversed(path)]
+
+
+def _init_worker(state, paths):
+    global _STATE, _PATHS
+    _STATE, _PATHS = state, paths
+
+
+def _solve(task):
+    return _STATE.solve(task, _PATHS)
+
+
+def batch_latencies(graph, queries, processes=None, chunksize=1, paths=False):
+    """
+    Answer many latency queries, one shortest-path tree per distinct
+    (source, failure set).
+
+    The base topology is handed to each worker once at start-up; tasks only
+    carry node ids. Results are yielded group by group as they complete,
+    so their order is not the query order (use the 'query' number).
+
+    Args:
+        graph: Graph to route on (non-negative weights)
+        queries: Iterable of (source, destination) or
+            (source, destination, failed_cities, failed_links) tuples
+        processes: Worker count (defaults to the CPU count); 1 runs inline
+        chunksize: Groups sent to a worker at a time
+        paths: Also return the node path of every query
+
+    Yields:
+        dict: {'query', 'source', 'destination', 'latency'[, 'path']}
+    """
+    state = BatchState(graph)
+    tasks = state.group(queries)
+
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from state.solve(task, paths)
+        return
+
+    with multiprocessing.Pool(min(processes or os.cpu_count(), len(tasks)), initializer=_init_worker,
+                              initargs=(state, paths)) as pool:
+        for results in pool.imap_unordered(_solve, tasks, chunksize):
+            yield from results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch latency queries (JSON Lines in and out)")
+    parser.add_argument('queries', nargs='?', help="JSON Lines file of {\"source\", \"destination\", "
+                                                   "\"failed_cities\", \"failed_links\"} (default: stdin)")
+    parser.add_argument('--topology', help="CSV, JSON Lines or snapshot topology (default: built-in network)")
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--paths', action='store_true', help="Include the node path of every query")
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        from topology_io import load_topology
+        graph = load_topology(args.topology)
+    else:
+        graph = Graph()
+
+    source = open(args.queries, encoding='utf-8') if args.queries else sys.stdin
+    try:
+        queries = []
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                queries.append((record['source'], record['destination'],
+                                record.get('failed_cities', ()), record.get('failed_links', ())))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    for result in batch_latencies(graph, queries, args.processes, paths=args.paths):
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()
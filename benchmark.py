@@ -0,0 +1,288 @@
+"""
+Benchmark module.
+Times the routing algorithms on synthetic topologies (see
+topology_generators), records peak memory and relaxation counts, writes the
+results as JSON and compares two result files to catch regressions.
+
+    python benchmark.py run --sizes 10 1000 100000 --output results.json
+    python benchmark.py compare baseline.json results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from graph_algorithms import QueryStats
+from topology_generators import GENERATORS, generate
+
+INF = float('inf')
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+def _counters(stats):
+    return {'relaxations': stats.edges_relaxed, 'passes': stats.passes}
+
+
+def _dijkstra(graph, source):
+    stats = QueryStats()
+    graph.dijkstra(source, stats=stats)
+    return lambda: graph.dijkstra(source), _counters(stats)
+
+
+def _bellman_ford(graph, source):
+    stats = QueryStats()
+    graph.bellman_ford(source, stats=stats)
+    return lambda: graph.bellman_ford(source), _counters(stats)
+
+
+def _bellman_ford_numpy(graph, source):
+    from bellman_ford_numpy import bellman_ford_arrays
+
+    compact = graph.freeze()
+    _, _, passes = bellman_ford_arrays(compact, compact.index[source])
+    # Frontier passes relax a varying subset of the edges: only passes are known
+    return lambda: bellman_ford_arrays(compact, compact.index[source]), {'passes': passes}
+
+
+def _spfa(graph, source):
+    stats = QueryStats()
+    graph.spfa(source, stats=stats)
+    return lambda: graph.spfa(source), _counters(stats)
+
+
+def _reconstruct_path(graph, source):
+    distances, predecessors = graph.spfa(source)[:2]
+    farthest = max((node for node, d in distances.items() if d < INF), key=distances.get)
+    return lambda: graph.reconstruct_path(predecessors, source, farthest), {}
+
+
+def _positions(graph):
+    """Graph coordinates, random ones for nodes without (drawing cost only)."""
+    import numpy as np
+
+    positions = graph.get_positions()
+    rng = np.random.default_rng(0)
+    for node in graph.get_nodes():
+        if node not in positions:
+            positions[node] = tuple(rng.random(2))
+    return positions
+
+
+def _render_base(graph, source):
+    from network_render import NetworkRenderer
+
+    positions = _positions(graph)
+    return lambda: NetworkRenderer(graph, positions), {}
+
+
+def _render_overlay(graph, source):
+    from network_render import NetworkRenderer
+
+    renderer = NetworkRenderer(graph, _positions(graph))
+    distances, predecessors = graph.dijkstra(source)
+    farthest = max((node for node, d in distances.items() if d < INF), key=distances.get)
+    path = graph.reconstruct_path(predecessors, source, farthest)
+    return lambda: renderer.render(path, [], []), {}
+
+
+# name -> (setup returning (callable, counters), largest size, handles negative weights)
+ALGORITHMS = {
+    'dijkstra': (_dijkstra, 10 ** 6, False),
+    'bellman_ford': (_bellman_ford, 10 ** 4, True),
+    'bellman_ford_numpy': (_bellman_ford_numpy, 10 ** 6, True),
+    'spfa': (_spfa, 10 ** 5, True),
+    'reconstruct_path': (_reconstruct_path, 10 ** 5, True),
+    'render_base': (_render_base, 1000, False),
+    'render_overlay': (_render_overlay, 1000, False),
+}
+
+
+def measure(func, repeat):
+    """
+    Time func repeat times, then run it once more under tracemalloc.
+
+    Returns:
+        dict: min / median seconds and peak traced memory in bytes
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds_min': min(times),
+        'seconds_median': statistics.median(times),
+        'peak_bytes': peak,
+    }
+
+
+def run(topologies=None, sizes=None, algorithms=None, negative=False, repeat=3, seed=0,
+        max_nodes=None, log=None):
+    """
+    Benchmark every (topology, size, algorithm) combination.
+
+    Algorithms are skipped above their size limit (see ALGORITHMS, or
+    max_nodes for all of them) and, for Dijkstra-based ones, on negative
+    weights.
+
+    Args:
+        topologies: Generator names (default: all)
+        sizes: Requested node counts (default: DEFAULT_SIZES)
+        algorithms: Algorithm names (default: all)
+        negative: Also benchmark each topology with negative weights
+        repeat: Timed runs per measurement
+        seed: Generator seed
+        max_nodes: Override every algorithm's size limit
+        log: Optional text stream for progress lines
+
+    Returns:
+        dict: {'meta': {...}, 'results': [...]}
+    """
+    topologies = topologies or list(GENERATORS)
+    sizes = sizes or DEFAULT_SIZES
+    algorithms = algorithms or list(ALGORITHMS)
+    results = []
+
+    for kind in topologies:
+        for size in sizes:
+            for negative_weights in ([False, True] if negative else [False]):
+                graph = generate(kind, size, seed=seed, negative_weights=negative_weights)
+                compact = graph.freeze()
+                source = compact.names[0]
+                for name in algorithms:
+                    setup, limit, handles_negative = ALGORITHMS[name]
+                    if compact.num_nodes > (max_nodes or limit) or (negative_weights and not handles_negative):
+                        continue
+                    func, counters = setup(graph, source)
+                    record = {
+                        'topology': kind,
+                        'size': size,
+                        'nodes': compact.num_nodes,
+                        'edges': compact.num_edges,
+                        'negative_weights': negative_weights,
+                        'algorithm': name,
+                        'repeat': repeat,
+                        'relaxations': None,
+                        'passes': None,
+                    }
+                    record.update(counters)
+                    record.update(measure(func, repeat))
+                    results.append(record)
+                    if log is not None:
+                        log.write(f"{kind:>14} {compact.num_nodes:>8} {'neg' if negative_weights else '   '} "
+                                  f"{name:<18} {record['seconds_min'] * 1000:10.3f} ms "
+                                  f"{record['peak_bytes'] / 1024:10.1f} KiB\n")
+                        log.flush()
+
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': seed,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def _key(record):
+    return (record['topology'], record['size'], record['negative_weights'], record['algorithm'])
+
+
+def compare(baseline, current, threshold=0.2, noise_floor=1e-4):
+    """
+    Match the records of two result sets and flag slowdowns.
+
+    Args:
+        baseline: Result dict of the reference run
+        current: Result dict of the new run
+        threshold: Relative slowdown of seconds_min counted as a regression
+        noise_floor: Absolute slowdown (seconds) below which timer noise is
+            never reported as a regression
+
+    Returns:
+        list: One dict per matched record with the time ratio and a
+            'regression' flag, regressions first
+    """
+    reference = {_key(record): record for record in baseline['results']}
+    rows = []
+    for record in current['results']:
+        before = reference.get(_key(record))
+        if before is None:
+            continue
+        ratio = record['seconds_min'] / before['seconds_min'] if before['seconds_min'] > 0 else INF
+        rows.append({
+            'topology': record['topology'],
+            'size': record['size'],
+            'negative_weights': record['negative_weights'],
+            'algorithm': record['algorithm'],
+            'before': before['seconds_min'],
+            'after': record['seconds_min'],
+            'ratio': ratio,
+            'peak_ratio': record['peak_bytes'] / before['peak_bytes'] if before['peak_bytes'] else None,
+            'regression': ratio > 1 + threshold and record['seconds_min'] - before['seconds_min'] > noise_floor,
+        })
+    rows.sort(key=lambda row: (not row['regression'], -row['ratio']))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Routing algorithm benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and write JSON results")
+    run_parser.add_argument('--topologies', nargs='+', choices=list(GENERATORS))
+    run_parser.add_argument('--sizes', nargs='+', type=int)
+    run_parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS))
+    run_parser.add_argument('--negative', action='store_true', help="Also run with negative weights")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--max-nodes', type=int, help="Size limit for every algorithm")
+    run_parser.add_argument('--output', help="Result file (default: stdout)")
+
+    compare_parser = commands.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    compare_parser.add_argument('--noise-floor', type=float, default=1e-4)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.topologies, args.sizes, args.algorithms, args.negative, args.repeat,
+                      args.seed, args.max_nodes, log=sys.stderr)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold, args.noise_floor)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['topology']:>14} {row['size']:>8} {'neg' if row['negative_weights'] else '   '} "
+              f"{row['algorithm']:<17} {row['before'] * 1000:10.3f} -> {row['after'] * 1000:10.3f} ms "
+              f"x{row['ratio']:.2f} {flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
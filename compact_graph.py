@@ -0,0 +1,195 @@
+"""
+Compact graph representation module.
+Stores a frozen topology in compressed-sparse-row (CSR) form: node names are
+interned to integer ids and the adjacency lives in three flat buffers.
+"""
+
+from array import array
+
+
+class CompactGraph:
+    """Immutable CSR graph: offsets, targets and weights indexed by node id."""
+
+    def __init__(self, names, offsets, targets, weights):
+        """
+        Wrap existing CSR buffers.
+
+        Args:
+            names: List of node names, position = node id
+            offsets: Buffer of len(names) + 1 edge offsets
+            targets: Buffer of edge target ids
+            weights: Buffer of edge weights
+        """
+        if len(offsets) != len(names) + 1:
+            raise ValueError("offsets must have one entry per node plus one")
+        if len(targets) != len(weights):
+            raise ValueError("targets and weights must have the same length")
+
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.index = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        """
+        Freeze an adjacency dict {node: [(neighbor, weight), ...]}.
+
+        Nodes that only appear as neighbors are interned after the dict keys.
+        Integer weights are kept as integers, anything else is stored as float.
+
+        Args:
+            adjacency: Dictionary of adjacency lists
+
+        Returns:
+            CompactGraph: Frozen copy of the topology
+        """
+        names = list(adjacency.keys())
+        index = {name: i for i, name in enumerate(names)}
+        for neighbors in adjacency.values():
+            for neighbor, _ in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = len(names)
+                    names.append(neighbor)
+
+        integer_weights = all(
+            isinstance(weight, int) and not isinstance(weight, bool)
+            for neighbors in adjacency.values() for _, weight in neighbors
+        )
+
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('q' if integer_weights else 'd')
+        for name in names:
+            for neighbor, weight in adjacency.get(name, ()):
+                targets.append(index[neighbor])
+                weights.append(weight)
+            offsets.append(len(targets))
+
+        return cls(names, offsets, targets, weights)
+
+    @classmethod
+    def from_edge_arrays(cls, names, sources, targets, weights):
+        """
+        Build CSR buffers from parallel edge arrays (stable counting sort).
+
+        Args:
+            names: List of node names, position = node id
+            sources: Sequence of edge source ids
+            targets: Sequence of edge target ids
+            weights: Sequence of edge weights
+
+        Returns:
+            CompactGraph: Frozen topology, edges of a node kept in input order
+        """
+        import numpy as np
+
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind='stable')
+        counts = np.bincount(sources, minlength=len(names))
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        weights = np.asarray(weights)
+        typecode = 'q' if weights.dtype.kind in 'iu' else 'd'
+        return cls(
+            names,
+            array('q', offsets.tobytes()),
+            array('i', np.asarray(targets, dtype=np.int32)[order].tobytes()),
+            array(typecode, weights[order].astype(typecode).tobytes()),
+        )
+
+    @property
+    def num_nodes(self):
+        """Number of interned nodes."""
+        return len(self.names)
+
+    @property
+    def num_edges(self):
+        """Number of directed edges."""
+        return len(self.targets)
+
+    def id_of(self, name):
+        """Return the integer id of a node name."""
+        return self.index[name]
+
+    def name_of(self, node_id):
+        """Return the node name of an integer id."""
+        return self.names[node_id]
+
+    def neighbors(self, node_id):
+        """Return the (target id, weight) pairs leaving a node id."""
+        start, end = self.offsets[node_id], self.offsets[node_id + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def edge_weight(self, source_id, target_id):
+        """Return the weight of the first edge source -> target, or None."""
+        for k in range(self.offsets[source_id], self.offsets[source_id + 1]):
+            if self.targets[k] == target_id:
+                return self.weights[k]
+        return None
+
+    def edges(self):
+        """Iterate over all edges as (source id, target id, weight)."""
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        for u in range(len(self.names)):
+            for k in range(offsets[u], offsets[u + 1]):
+                yield u, targets[k], weights[k]
+
+    def with_weights(self, edge_ids, weights):
+        """
+        Return a copy with some edge weights replaced.
+
+        The CSR structure (names, offsets, targets) is shared; only the
+        weight buffer is copied, so views and derived structures of this
+        graph stay valid. Integer weights stay integers unless a new weight
+        is not one.
+
+        Args:
+            edge_ids: Sequence of edge ids
+            weights: New weight of each edge
+
+        Returns:
+            CompactGraph: Graph with the new weights
+        """
+        integer = all(isinstance(w, int) and not isinstance(w, bool) for w in weights)
+        integer &= self.as_numpy()[2].dtype.kind in 'iu'
+        new_weights = array('q' if integer else 'd', self.weights)
+        for k, weight in zip(edge_ids, weights):
+            new_weights[k] = weight
+        return CompactGraph(self.names, self.offsets, self.targets, new_weights)
+
+    def reversed(self):
+        """Return the CompactGraph with every edge reversed (built once, then cached)."""
+        if getattr(self, '_reversed', None) is None:
+            import numpy as np
+
+            offsets, targets, weights = self.as_numpy()
+            sources = np.repeat(np.arange(self.num_nodes), np.diff(offsets))
+            self._reversed = CompactGraph.from_edge_arrays(self.names, targets, sources, weights)
+        return self._reversed
+
+    def to_adjacency(self):
+        """Thaw back into an adjacency dict keyed by node name."""
+        names = self.names
+        return {
+            name: [(names[v], w) for v, w in self.neighbors(u)]
+            for u, name in enumerate(names)
+        }
+
+    def as_numpy(self):
+        """
+        Return zero-copy NumPy views of the CSR buffers.
+
+        Returns:
+            tuple: (offsets, targets, weights) arrays
+        """
+        import numpy as np
+
+        def view(buffer):
+            if isinstance(buffer, array):
+                return np.frombuffer(buffer, dtype=buffer.typecode)
+            return np.asarray(buffer)
+
+        return view(self.offsets), view(self.targets), view(self.weights)
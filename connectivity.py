@@ -0,0 +1,247 @@
+"""
+Connectivity index module.
+Precomputes bridges, articulation points, biconnected and 2-edge-connected
+components of a Graph (linear-time Tarjan DFS) so that "does this failure
+partition the network?" is answered without a shortest-path run.
+Links are treated as undirected.
+"""
+
+from bisect import bisect_right
+
+
+class ConnectivityIndex:
+    """Bridge / articulation-point index, rebuilt lazily when the topology changes."""
+
+    def __init__(self, graph):
+        """
+        Args:
+            graph: Graph to index
+        """
+        self.graph = graph
+        self._compact = None
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the index if the graph was modified since the last build."""
+        compact = self.graph.freeze()
+        if compact is not self._compact:
+            self._compact = compact
+            self._build(compact)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def bridges(self):
+        """Return the bridges as (node, node) pairs."""
+        self.refresh()
+        names = self._compact.names
+        return [(names[u], names[v]) for u, v in sorted(self._bridge_child)]
+
+    def articulation_points(self):
+        """Return the articulation points (cut cities)."""
+        self.refresh()
+        return [self._compact.names[u] for u in sorted(self._articulation)]
+
+    def biconnected_components(self):
+        """Return the biconnected components as sets of nodes."""
+        self.refresh()
+        names = self._compact.names
+        return [{names[u] for u in component} for component in self._bcc]
+
+    def two_edge_connected_component(self, node):
+        """Return the id of the 2-edge-connected component of a node."""
+        self.refresh()
+        return self._two_edge[self._compact.index[node]]
+
+    def is_bridge(self, a, b):
+        """Return whether the link a - b is a bridge."""
+        self.refresh()
+        u, v = self._compact.index[a], self._compact.index[b]
+        return (min(u, v), max(u, v)) in self._bridge_child
+
+    def is_articulation_point(self, node):
+        """Return whether removing a city disconnects its component."""
+        self.refresh()
+        return self._compact.index[node] in self._articulation
+
+    def is_reachable(self, source, destination, failed_links=(), failed_cities=()):
+        """
+        Check whether destination stays reachable from source under failures.
+
+        No failure, a single link or a single city is answered in O(1) /
+        O(log degree) from the DFS tree intervals; any number of failed
+        bridges in O(k). Other multi-failure sets fall back to a linear
+        search over the surviving graph.
+
+        Args:
+            source: Starting node
+            destination: Target node
+            failed_links: Iterable of (node, node) links that are down
+            failed_cities: Iterable of cities that are down
+
+        Returns:
+            bool: Whether a path still exists
+        """
+        self.refresh()
+        index = self._compact.index
+        s, t = index[source], index[destination]
+        cities = {index[c] for c in failed_cities}
+        links = {(min(index[a], index[b]), max(index[a], index[b])) for a, b in failed_links}
+        links = {link for link in links if link[0] not in cities and link[1] not in cities}
+
+        if s in cities or t in cities:
+            return False
+        if self._component[s] != self._component[t]:
+            return False
+        if s == t:
+            return True
+
+        if not cities:
+            if all(link in self._bridge_child for link in links):
+                # Only bridges failed: each one cuts off exactly one DFS subtree
+                for link in links:
+                    child = self._bridge_child[link]
+                    if self._in_subtree(s, child) != self._in_subtree(t, child):
+                        return False
+                return True
+            if len(links) == 1:
+                return True
+        elif not links and len(cities) == 1:
+            x = next(iter(cities))
+            if x not in self._articulation:
+                return True
+            return self._piece_after_removal(s, x) == self._piece_after_removal(t, x)
+
+        return self._search(s, t, links, cities)
+
+    # ------------------------------------------------------------------
+    # Index construction
+    # ------------------------------------------------------------------
+
+    def _build(self, compact):
+        n = compact.num_nodes
+
+        # Undirected simple graph: a link fails as a whole, parallel edges included
+        pairs = {(min(u, v), max(u, v)) for u, v, _ in compact.edges() if u != v}
+        adjacency = [[] for _ in range(n)]
+        for link, (u, v) in enumerate(sorted(pairs)):
+            adjacency[u].append((v, link))
+            adjacency[v].append((u, link))
+        self._adjacency = adjacency
+
+        tin = [-1] * n
+        low = [0] * n
+        tout = [0] * n
+        component = [-1] * n
+        children = [[] for _ in range(n)]
+        bridge_child = {}
+        articulation = set()
+        bcc = []
+        timer = 0
+
+        for root in range(n):
+            if tin[root] != -1:
+                continue
+            tin[root] = low[root] = timer
+            timer += 1
+            component[root] = root
+            stack = [(root, -1, 0)]
+            edge_stack = []
+
+            while stack:
+                u, parent_link, i = stack[-1]
+                if i < len(adjacency[u]):
+                    stack[-1] = (u, parent_link, i + 1)
+                    v, link = adjacency[u][i]
+                    if link == parent_link:
+                        continue
+                    if tin[v] == -1:
+                        tin[v] = low[v] = timer
+                        timer += 1
+                        component[v] = root
+                        children[u].append(v)
+                        edge_stack.append((u, v))
+                        stack.append((v, link, 0))
+                    elif tin[v] < tin[u]:
+                        low[u] = min(low[u], tin[v])
+                        edge_stack.append((u, v))
+                    continue
+
+                # u is finished
+                stack.pop()
+                tout[u] = timer
+                if not stack:
+                    continue
+                p = stack[-1][0]
+                low[p] = min(low[p], low[u])
+                if low[u] > tin[p]:
+                    bridge_child[(min(p, u), max(p, u))] = u
+                if low[u] >= tin[p]:
+                    if p != root:
+                        articulation.add(p)
+                    nodes = set()
+                    while True:
+                        a, b = edge_stack.pop()
+                        nodes.add(a)
+                        nodes.add(b)
+                        if (a, b) == (p, u):
+                            break
+                    bcc.append(nodes)
+
+            # A DFS root is a cut city only if it has several tree children
+            if len(children[root]) > 1:
+                articulation.add(root)
+            if not adjacency[root]:
+                bcc.append({root})
+
+        # 2-edge-connected components: connected pieces once bridges are removed
+        two_edge = [-1] * n
+        for start in range(n):
+            if two_edge[start] != -1:
+                continue
+            two_edge[start] = start
+            stack = [start]
+            while stack:
+                u = stack.pop()
+                for v, _ in adjacency[u]:
+                    if two_edge[v] == -1 and (min(u, v), max(u, v)) not in bridge_child:
+                        two_edge[v] = start
+                        stack.append(v)
+
+        self._tin, self._tout, self._low = tin, tout, low
+        self._component = component
+        self._children = children
+        self._children_tin = [[tin[c] for c in kids] for kids in children]
+        self._bridge_child = bridge_child
+        self._articulation = articulation
+        self._bcc = bcc
+        self._two_edge = two_edge
+
+    def _in_subtree(self, node, root):
+        return self._tin[root] <= self._tin[node] < self._tout[root]
+
+    def _piece_after_removal(self, node, cut):
+        """Identify the piece a node ends up in once a cut city is removed."""
+        if not self._in_subtree(node, cut):
+            return -1
+        i = bisect_right(self._children_tin[cut], self._tin[node]) - 1
+        child = self._children[cut][i]
+        # Children that reach above the cut city stay attached to the rest
+        return child if self._low[child] >= self._tin[cut] else -1
+
+    def _search(self, s, t, links, cities):
+        """Plain search over the surviving graph (fallback for general failure sets)."""
+        adjacency = self._adjacency
+        seen = {s}
+        stack = [s]
+        while stack:
+            u = stack.pop()
+            for v, _ in adjacency[u]:
+                if v in seen or v in cities or (min(u, v), max(u, v)) in links:
+                    continue
+                if v == t:
+                    return True
+                seen.add(v)
+                stack.append(v)
+        return False
@@ -0,0 +1,288 @@
+"""
+Contraction hierarchy module.
+Preprocesses a static Graph into a node ordering plus shortcut edges, then
+answers distance and path queries with a bidirectional search that only
+climbs the hierarchy. The preprocessed hierarchy can be saved and reloaded.
+"""
+
+import heapq
+import json
+
+import numpy as np
+
+INF = float('inf')
+NO_MIDDLE = -1
+
+
+class ContractionHierarchy:
+    """Upward/downward search graphs of a contracted topology."""
+
+    def __init__(self, names, rank, up, down):
+        """
+        Args:
+            names: List of node names, position = node id
+            rank: Contraction order of every node id
+            up: (offsets, targets, weights, middles) of edges u -> v with rank[v] > rank[u]
+            down: Same layout for reversed edges v -> u of edges u -> v with rank[u] > rank[v]
+        """
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.rank = rank
+        self.up = tuple(list(a) for a in up)
+        self.down = tuple(list(a) for a in down)
+
+        # (u, v) -> middle node of the shortcut, for path unpacking
+        self.middle = {}
+        for (offsets, targets, _, middles), forward in ((self.up, True), (self.down, False)):
+            for u in range(len(names)):
+                for k in range(offsets[u], offsets[u + 1]):
+                    edge = (u, targets[k]) if forward else (targets[k], u)
+                    self.middle[edge] = middles[k]
+
+    # ------------------------------------------------------------------
+    # Preprocessing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, graph, witness_settle_limit=500):
+        """
+        Contract every node of a Graph (non-negative weights).
+
+        Nodes are contracted by increasing edge difference plus the number of
+        already contracted neighbours, with lazy priority updates. A shortcut
+        u -> x through v is added only when a bounded witness search finds no
+        path from u to x avoiding v that is as short.
+
+        Args:
+            graph: Graph to preprocess
+            witness_settle_limit: Nodes settled per witness search before giving
+                up (a shortcut is then added, which is always safe)
+
+        Returns:
+            ContractionHierarchy: Preprocessed hierarchy
+        """
+        compact = graph.freeze()
+        n = compact.num_nodes
+
+        # Remaining graph: cheapest edge per pair, with the middle node of shortcuts
+        out_edges = [{} for _ in range(n)]
+        in_edges = [{} for _ in range(n)]
+        for u, v, weight in compact.edges():
+            if u != v and weight < out_edges[u].get(v, (INF,))[0]:
+                out_edges[u][v] = (weight, NO_MIDDLE)
+                in_edges[v][u] = (weight, NO_MIDDLE)
+
+        contracted = [False] * n
+        contracted_neighbors = [0] * n
+        rank = [0] * n
+        final_edges = []
+
+        def shortcuts(v):
+            """Shortcuts needed to contract v, as (u, x, weight)."""
+            needed = []
+            outgoing = [(x, w) for x, (w, _) in out_edges[v].items() if not contracted[x]]
+            if not outgoing:
+                return needed
+            max_out = max(w for _, w in outgoing)
+            for u, (w_in, _) in in_edges[v].items():
+                if contracted[u]:
+                    continue
+                witness = _witness_search(out_edges, contracted, u, v, w_in + max_out, witness_settle_limit)
+                for x, w_out in outgoing:
+                    if x != u and witness.get(x, INF) > w_in + w_out:
+                        needed.append((u, x, w_in + w_out))
+            return needed
+
+        def priority(v):
+            removed = sum(1 for x in out_edges[v] if not contracted[x]) + \
+                sum(1 for u in in_edges[v] if not contracted[u])
+            return len(shortcuts(v)) - removed + contracted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-queue if the priority went stale
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            for u, x, weight in shortcuts(v):
+                if weight < out_edges[u].get(x, (INF,))[0]:
+                    out_edges[u][x] = (weight, v)
+                    in_edges[x][u] = (weight, v)
+
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            # Edges to already contracted neighbours were kept when those went
+            for x, (weight, middle) in out_edges[v].items():
+                if not contracted[x]:
+                    final_edges.append((v, x, weight, middle))
+                    contracted_neighbors[x] += 1
+            for u, (weight, middle) in in_edges[v].items():
+                if not contracted[u]:
+                    final_edges.append((u, v, weight, middle))
+                    contracted_neighbors[u] += 1
+
+        # Every edge joins a node to a later-contracted one: split by direction
+        up = [[] for _ in range(n)]
+        down = [[] for _ in range(n)]
+        for u, x, weight, middle in final_edges:
+            if rank[x] > rank[u]:
+                up[u].append((x, weight, middle))
+            else:
+                down[x].append((u, weight, middle))
+
+        return cls(list(compact.names), rank, _to_csr(up), _to_csr(down))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def distance(self, source, target):
+        """Return the shortest distance source -> target (inf if unreachable)."""
+        return self._search(self.index[source], self.index[target])[0]
+
+    def query(self, source, target):
+        """
+        Shortest distance and unpacked path.
+
+        Returns:
+            tuple: (distance, path list; empty if unreachable)
+        """
+        s, t = self.index[source], self.index[target]
+        distance, meeting, parents = self._search(s, t)
+        if meeting is None:
+            return INF, []
+
+        packed = [meeting]
+        while packed[-1] != s:
+            packed.append(parents[0][packed[-1]])
+        packed.reverse()
+        v = meeting
+        while v != t:
+            v = parents[1][v]
+            packed.append(v)
+
+        path = [packed[0]]
+        for u, v in zip(packed, packed[1:]):
+            self._unpack(u, v, path)
+        return distance, [self.names[v] for v in path]
+
+    def _search(self, s, t):
+        """Bidirectional upward Dijkstra; returns (distance, meeting node, parents)."""
+        if s == t:
+            return 0, s, ({s: s}, {t: t})
+
+        graphs = (self.up, self.down)
+        dist = ({s: 0}, {t: 0})
+        parents = ({s: s}, {t: t})
+        heaps = ([(0, s)], [(0, t)])
+        settled = (set(), set())
+        best, meeting = INF, None
+
+        while heaps[0] or heaps[1]:
+            side = 0 if not heaps[1] or (heaps[0] and heaps[0][0][0] <= heaps[1][0][0]) else 1
+            d, u = heapq.heappop(heaps[side])
+            if d >= best:
+                # Nothing left on this side can improve the meeting point
+                heaps[side].clear()
+                continue
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+
+            if u in dist[1 - side] and d + dist[1 - side][u] < best:
+                best, meeting = d + dist[1 - side][u], u
+
+            offsets, targets, weights, _ = graphs[side]
+            own = dist[side]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_distance = d + weights[k]
+                if new_distance < own.get(v, INF):
+                    own[v] = new_distance
+                    parents[side][v] = u
+                    heapq.heappush(heaps[side], (new_distance, v))
+                    if v in dist[1 - side] and new_distance + dist[1 - side][v] < best:
+                        best, meeting = new_distance + dist[1 - side][v], v
+
+        return best, meeting, parents
+
+    def _unpack(self, u, v, path):
+        """Append the original nodes of edge u -> v (after u) to path."""
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle = self.middle[(a, b)]
+            if middle == NO_MIDDLE:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the hierarchy to a NumPy .npz archive."""
+        arrays = {
+            'names': np.frombuffer(json.dumps(self.names, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+            'rank': np.asarray(self.rank, dtype=np.int32),
+        }
+        for prefix, (offsets, targets, weights, middles) in (('up', self.up), ('down', self.down)):
+            arrays[f'{prefix}_offsets'] = np.asarray(offsets, dtype=np.int64)
+            arrays[f'{prefix}_targets'] = np.asarray(targets, dtype=np.int32)
+            arrays[f'{prefix}_weights'] = np.asarray(weights)
+            arrays[f'{prefix}_middles'] = np.asarray(middles, dtype=np.int32)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a hierarchy written by save()."""
+        with np.load(path) as data:
+            names = json.loads(data['names'].tobytes().decode('utf-8'))
+            csr = {
+                prefix: tuple(data[f'{prefix}_{field}'].tolist() for field in ('offsets', 'targets', 'weights', 'middles'))
+                for prefix in ('up', 'down')
+            }
+            return cls(names, data['rank'].tolist(), csr['up'], csr['down'])
+
+
+def _witness_search(out_edges, contracted, source, excluded, limit, settle_limit):
+    """Bounded Dijkstra from source avoiding one node, over the remaining graph."""
+    dist = {source: 0}
+    heap = [(0, source)]
+    settled = 0
+    while heap and settled < settle_limit:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for v, (weight, _) in out_edges[u].items():
+            if v == excluded or contracted[v]:
+                continue
+            new_distance = d + weight
+            if new_distance < dist.get(v, INF):
+                dist[v] = new_distance
+                heapq.heappush(heap, (new_distance, v))
+    return dist
+
+
+def _to_csr(adjacency):
+    offsets, targets, weights, middles = [0], [], [], []
+    for edges in adjacency:
+        for v, weight, middle in edges:
+            targets.append(v)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(targets))
+    return offsets, targets, weights, middles
@@ -0,0 +1,307 @@
+"""
+Dynamic shortest path module.
+Maintains a single-source shortest-path tree under link/city failures and
+recoveries, repairing only the affected part of the tree (Ramalingam-Reps).
+"""
+
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+
+def repair_subtree(lost, dist, weights, offsets, targets, in_edges, edge_sources, usable):
+    """
+    Reattach the nodes cut off from a shortest-path tree.
+
+    Each cut-off node first gets its best entry from the intact part of the
+    tree, then a Dijkstra restricted to the cut-off nodes settles them all.
+
+    Args:
+        lost: Set of cut-off node ids (failed nodes left out)
+        dist: Distance of every node; only the intact ones are read
+        weights: Edge weights by edge id
+        offsets: CSR offsets of the out-edges
+        targets: Head node of every edge id
+        in_edges: Incoming edge ids of every node
+        edge_sources: Tail node of every edge id
+        usable: Predicate on edge ids, False for failed edges
+
+    Returns:
+        dict: {node: (distance, parent, edge id)} for the cut-off nodes that
+            can be reached again, in settle order
+    """
+    best = {}
+    heap = []
+    for v in lost:
+        entry = (INF, None, -1)
+        for k in in_edges[v]:
+            u = edge_sources[k]
+            if u in lost or not usable(k):
+                continue
+            candidate = dist[u] + weights[k]
+            if candidate < entry[0]:
+                entry = (candidate, u, k)
+        if entry[0] < INF:
+            best[v] = entry
+            heap.append((entry[0], v))
+    heapq.heapify(heap)
+
+    settled = {}
+    while heap:
+        d, v = heapq.heappop(heap)
+        if v in settled:
+            continue
+        settled[v] = best[v]
+        for k in range(offsets[v], offsets[v + 1]):
+            w = targets[k]
+            if w not in lost or w in settled or not usable(k):
+                continue
+            candidate = d + weights[k]
+            if w not in best or candidate < best[w][0]:
+                best[w] = (candidate, v, k)
+                heapq.heappush(heap, (candidate, w))
+    return settled
+
+
+class DynamicShortestPaths:
+    """Shortest-path tree from one source, updated in place as the topology changes."""
+
+    def __init__(self, graph, source_node):
+        """
+        Args:
+            graph: Graph to route on (non-negative weights)
+            source_node: Starting node name
+        """
+        if source_node not in graph.node_index:
+            raise ValueError(f"Node {source_node} not in graph")
+
+        compact = graph.freeze()
+        offsets, targets, _ = compact.as_numpy()
+        n, m = compact.num_nodes, compact.num_edges
+
+        self.compact = compact
+        self.names = compact.names
+        self.source = compact.index[source_node]
+
+        self.offsets = list(compact.offsets)
+        self.targets = list(compact.targets)
+        self.weights = list(compact.weights)
+        self.edge_sources = np.repeat(np.arange(n), np.diff(offsets)).tolist()
+
+        # Incoming edge ids of every node
+        in_offsets = np.cumsum(np.bincount(targets, minlength=n))[:-1]
+        self.in_edges = [edges.tolist() for edges in np.split(np.argsort(targets, kind='stable'), in_offsets)]
+
+        self.edge_down = [False] * m
+        self.node_down = [False] * n
+
+        self.dist = [INF] * n
+        self.parent = [None] * n
+        self.parent_edge = [-1] * n
+        self.dist[self.source] = 0
+        self.parent[self.source] = self.source
+        self._propagate([(0, self.source)])
+
+    # ------------------------------------------------------------------
+    # Topology events
+    # ------------------------------------------------------------------
+
+    def fail_link(self, a, b, bidirectional=True):
+        """
+        Take every edge a -> b (and b -> a) down.
+
+        Returns:
+            set: Destinations whose route changed
+        """
+        edges = self._link_edges(a, b, bidirectional)
+        for k in edges:
+            self.edge_down[k] = True
+        return self._repair_increase([self.targets[k] for k in edges if self.parent_edge[self.targets[k]] == k])
+
+    def restore_link(self, a, b, bidirectional=True):
+        """
+        Bring every edge a -> b (and b -> a) back up.
+
+        Returns:
+            set: Destinations whose route changed
+        """
+        edges = self._link_edges(a, b, bidirectional)
+        for k in edges:
+            self.edge_down[k] = False
+        return self._repair_decrease(edges)
+
+    def fail_node(self, node):
+        """
+        Take a city and all its links down.
+
+        Returns:
+            set: Destinations whose route changed
+        """
+        x = self.compact.index[node]
+        self.node_down[x] = True
+        return self._repair_increase([x])
+
+    def restore_node(self, node):
+        """
+        Bring a city back up (its links keep their own state).
+
+        Returns:
+            set: Destinations whose route changed
+        """
+        x = self.compact.index[node]
+        self.node_down[x] = False
+        if x == self.source:
+            self.dist[x], self.parent[x] = 0, x
+            return {self.names[v] for v in self._propagate([(0, x)]) | {x}}
+        return self._repair_decrease(self.in_edges[x])
+
+    def update_weights(self, updates):
+        """
+        Change edge latencies: subtrees below tree edges that got slower are
+        recomputed, then improvements propagate from edges that got faster.
+
+        Args:
+            updates: Iterable of (a, b, weight), applied to every edge a -> b
+
+        Returns:
+            set: Destinations whose route or latency changed
+        """
+        increased, decreased = [], []
+        for a, b, weight in updates:
+            for k in self._link_edges(a, b, bidirectional=False):
+                old, self.weights[k] = self.weights[k], weight
+                if weight > old:
+                    increased.append(k)
+                elif weight < old:
+                    decreased.append(k)
+
+        roots = [self.targets[k] for k in increased if self.parent_edge[self.targets[k]] == k]
+        changed = self._repair_increase(roots)
+        if decreased and changed:
+            # A recomputed subtree may now enter through a faster edge and end
+            # up cheaper than before: its out-edges can improve other nodes
+            for name in changed:
+                u = self.compact.index[name]
+                decreased.extend(range(self.offsets[u], self.offsets[u + 1]))
+        return changed | self._repair_decrease(decreased)
+
+    # ------------------------------------------------------------------
+    # Queries (same contract as Graph.dijkstra)
+    # ------------------------------------------------------------------
+
+    def distances(self):
+        """Return the current distances dict."""
+        return dict(zip(self.names, self.dist))
+
+    def predecessors(self):
+        """Return the current predecessors dict."""
+        names = self.names
+        return {names[i]: (names[p] if p is not None else None) for i, p in enumerate(self.parent)}
+
+    def distance(self, node):
+        """Return the current distance to a node."""
+        return self.dist[self.compact.index[node]]
+
+    def path(self, node):
+        """Return the current path from the source to a node, or an empty list."""
+        v = self.compact.index[node]
+        if self.parent[v] is None:
+            return []
+        path = [v]
+        while v != self.source:
+            v = self.parent[v]
+            path.append(v)
+        return [self.names[i] for i in reversed(path)]
+
+    # ------------------------------------------------------------------
+    # Repair
+    # ------------------------------------------------------------------
+
+    def _link_edges(self, a, b, bidirectional):
+        index = self.compact.index
+        u, v = index[a], index[b]
+        pairs = [(u, v), (v, u)] if bidirectional else [(u, v)]
+        return [k for x, y in pairs for k in range(self.offsets[x], self.offsets[x + 1]) if self.targets[k] == y]
+
+    def _usable(self, k):
+        return not self.edge_down[k] and not self.node_down[self.edge_sources[k]] \
+            and not self.node_down[self.targets[k]]
+
+    def _subtree(self, roots):
+        """Collect the tree descendants of the given nodes (roots included)."""
+        offsets, targets, parent_edge = self.offsets, self.targets, self.parent_edge
+        affected = set(roots)
+        stack = list(affected)
+        while stack:
+            u = stack.pop()
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if parent_edge[v] == k and v not in affected:
+                    affected.add(v)
+                    stack.append(v)
+        return affected
+
+    def _repair_increase(self, roots):
+        """Recompute the subtrees hanging below edges/nodes that got worse."""
+        affected = self._subtree([r for r in roots if self.parent[r] is not None])
+        if not affected:
+            return set()
+
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        for v in affected:
+            dist[v], parent[v], parent_edge[v] = INF, None, -1
+
+        lost = {v for v in affected if not self.node_down[v]}
+        repaired = repair_subtree(lost, dist, self.weights, self.offsets, self.targets, self.in_edges,
+                                  self.edge_sources, self._usable)
+        for v, (d, u, k) in repaired.items():
+            dist[v], parent[v], parent_edge[v] = d, u, k
+        return {self.names[v] for v in affected}
+
+    def _repair_decrease(self, edges):
+        """Propagate improvements from edges that became usable or cheaper."""
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        heap = []
+        changed = set()
+        for k in edges:
+            u, v = self.edge_sources[k], self.targets[k]
+            if not self._usable(k) or dist[u] == INF:
+                continue
+            candidate = dist[u] + self.weights[k]
+            if candidate < dist[v]:
+                dist[v], parent[v], parent_edge[v] = candidate, u, k
+                heapq.heappush(heap, (candidate, v))
+                changed.add(v)
+
+        changed |= self._propagate(heap)
+        return {self.names[v] for v in changed}
+
+    def _propagate(self, heap):
+        """
+        Dijkstra from pre-seeded heap entries.
+
+        Returns:
+            set: Node ids whose distance improved
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        edge_down, node_down = self.edge_down, self.node_down
+        improved = set()
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if edge_down[k] or node_down[v]:
+                    continue
+                candidate = d + weights[k]
+                if candidate < dist[v]:
+                    dist[v], parent[v], parent_edge[v] = candidate, u, k
+                    heapq.heappush(heap, (candidate, v))
+                    improved.add(v)
+
+        return improved
@@ -0,0 +1,178 @@
+"""
+Equal-cost multipath module.
+Shortest-path DAG of a source, with every tight predecessor edge recorded in
+the same Dijkstra pass. The number of shortest paths to every node and the
+share of traffic each link carries when traffic is spread over all
+equal-cost paths are computed by dynamic programming over the DAG in its
+settle order, without enumerating paths: each costs one linear pass.
+"""
+
+from graph_algorithms import shortest_path_dag
+
+INF = float('inf')
+
+SPLITS = ('hop', 'path')
+
+
+class ShortestPathDAG:
+    """All shortest paths from one source, as a DAG of tight edges."""
+
+    def __init__(self, graph, source):
+        """
+        Args:
+            graph: Graph to route on (non-negative weights)
+            source: Source node name
+        """
+        self.compact = graph.freeze()
+        self.names = self.compact.names
+        if source not in self.compact.index:
+            raise ValueError(f"Node {source} not in graph")
+        self.source = self.compact.index[source]
+        self.distances, self.dag, self.order = shortest_path_dag(self.compact, self.source)
+
+        offsets = self.compact.offsets
+        self.edge_sources = [u for u in range(self.compact.num_nodes) for _ in range(offsets[u], offsets[u + 1])]
+        self._counts = None
+
+    def _index(self, node):
+        if node not in self.compact.index:
+            raise ValueError(f"Node {node} not in graph")
+        return self.compact.index[node]
+
+    def predecessors(self, node):
+        """Return the equal-cost predecessors of a node (empty for the source)."""
+        v = self._index(node)
+        return list(dict.fromkeys(self.names[self.edge_sources[k]] for k in self.dag[v]))
+
+    def _path_counts(self):
+        if self._counts is None:
+            counts = [0] * self.compact.num_nodes
+            counts[self.source] = 1
+            edge_sources = self.edge_sources
+            for v in self.order[1:]:
+                counts[v] = sum(counts[edge_sources[k]] for k in self.dag[v])
+            self._counts = counts
+        return self._counts
+
+    def path_counts(self):
+        """
+        Number of shortest paths from the source to every reachable node.
+
+        Parallel links between the same two nodes count as distinct paths.
+
+        Returns:
+            dict: {node: count}, 1 for the source
+        """
+        counts = self._path_counts()
+        return {self.names[v]: counts[v] for v in self.order}
+
+    def traffic_shares(self, destination, split='hop'):
+        """
+        Fraction of source -> destination traffic carried by each link.
+
+        Args:
+            destination: Destination node name
+            split: 'hop' (every node splits evenly across its equal-cost next
+                hops, as ECMP routers hash flows) or 'path' (every shortest
+                path carries the same share)
+
+        Returns:
+            dict: {(from_node, to_node): share} over the links of the
+                shortest paths; shares leaving the source sum to 1 (empty
+                if the destination is the source or unreachable)
+        """
+        if split not in SPLITS:
+            raise ValueError(f"Unknown split {split}")
+        return self.link_loads({destination: 1.0}, split)
+
+    def link_loads(self, demands, split='hop'):
+        """
+        Load of each link when the source sends traffic to several
+        destinations over all their shortest paths.
+
+        With the 'path' split every destination is handled in the same
+        backward pass; with the 'hop' split each destination needs one pass
+        over its own part of the DAG.
+
+        Args:
+            demands: {destination: volume}
+            split: 'hop' or 'path' (see traffic_shares)
+
+        Returns:
+            dict: {(from_node, to_node): load}; unreachable destinations
+                carry nothing
+        """
+        if split not in SPLITS:
+            raise ValueError(f"Unknown split {split}")
+        volumes = {}
+        for destination, volume in demands.items():
+            t = self._index(destination)
+            if t != self.source and self.distances[t] < INF and volume:
+                volumes[t] = volumes.get(t, 0.0) + volume
+
+        edge_loads = {}
+        if split == 'path':
+            self._path_loads(volumes, edge_loads)
+        else:
+            for t, volume in volumes.items():
+                self._hop_loads(t, volume, edge_loads)
+
+        loads = {}
+        names, edge_sources, targets = self.names, self.edge_sources, self.compact.targets
+        for k, load in edge_loads.items():
+            link = (names[edge_sources[k]], names[targets[k]])
+            loads[link] = loads.get(link, 0.0) + load
+        return loads
+
+    def _hop_loads(self, destination, volume, edge_loads):
+        """Per-hop even split towards one destination, added into edge_loads."""
+        edge_sources, dag = self.edge_sources, self.dag
+
+        # Part of the DAG leading to the destination, and next-hop counts in it
+        on_path = {destination}
+        stack = [destination]
+        fanout = {}
+        while stack:
+            v = stack.pop()
+            for k in dag[v]:
+                u = edge_sources[k]
+                fanout[u] = fanout.get(u, 0) + 1
+                if u not in on_path:
+                    on_path.add(u)
+                    stack.append(u)
+
+        flow = {self.source: volume}
+        for v in self.order:
+            if v not in on_path or v == self.source:
+                continue
+            inflow = 0.0
+            for k in dag[v]:
+                u = edge_sources[k]
+                share = flow[u] / fanout[u]
+                edge_loads[k] = edge_loads.get(k, 0.0) + share
+                inflow += share
+            flow[v] = inflow
+            if v == destination:
+                break
+
+    def _path_loads(self, volumes, edge_loads):
+        """
+        Even split over paths for every destination at once.
+
+        An edge u -> v carries count(u) * sum over destinations t of
+        volume(t) * paths(v -> t) / count(t); the sum obeys a recurrence
+        along the DAG read backwards.
+        """
+        counts = self._path_counts()
+        edge_sources, dag = self.edge_sources, self.dag
+        downstream = [0.0] * self.compact.num_nodes
+        for t, volume in volumes.items():
+            downstream[t] = volume / counts[t]
+
+        for v in reversed(self.order):
+            if not downstream[v]:
+                continue
+            for k in dag[v]:
+                u = edge_sources[k]
+                edge_loads[k] = counts[u] * downstream[v]
+                downstream[u] += downstream[v]
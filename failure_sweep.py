@@ -0,0 +1,246 @@
+"""
+Failure sweep module.
+Enumerates every single and double link/city failure of a Graph (N-1 / N-2),
+evaluates them across a process pool and streams a resilience report.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from all_sources import NO_NODE, SharedTables, all_sources
+from compact_graph import CompactGraph
+from graph_algorithms import Graph, shortest_path_tree
+
+INF = float('inf')
+
+# Scenarios in flight per worker, in chunks: bounds what the pool queues up
+SWEEP_WINDOW_CHUNKS = 4
+
+# Base topology of the worker processes, installed once per worker
+_STATE = None
+
+
+class SweepState:
+    """Base topology, failure elements and baseline routes shared by all scenarios."""
+
+    def __init__(self, graph, processes=None):
+        """
+        Args:
+            graph: Graph to analyse (non-negative weights)
+            processes: Worker count of the baseline all-sources pass
+        """
+        compact = graph.freeze()
+        n = compact.num_nodes
+        # Plain lists: picklable whatever backs the graph, and fast to index
+        self.compact = CompactGraph(list(compact.names), list(compact.offsets),
+                                    list(compact.targets), list(compact.weights))
+        self.names = self.compact.names
+        self.integral = all(isinstance(w, int) for w in self.compact.weights)
+
+        # Failure elements: undirected links (all edge ids between two cities), then cities
+        link_edges = {}
+        for k, (u, v, _) in enumerate(self.compact.edges()):
+            if u != v:
+                link_edges.setdefault((min(u, v), max(u, v)), []).append(k)
+        self.links = list(link_edges)
+        self.link_edges = [link_edges[link] for link in self.links]
+        link_number = {link: i for i, link in enumerate(self.links)}
+
+        # Incoming edge ids per node, to take a failed city out
+        self.in_edges = [[] for _ in range(n)]
+        for k, (_, v, _) in enumerate(self.compact.edges()):
+            self.in_edges[v].append(k)
+
+        # Baseline distances in a shared n x n matrix: workers attach to it
+        # instead of receiving a copy
+        self._tables = all_sources(graph, processes, distance_dtype=np.float64)
+        self.baseline = self._tables.distances
+
+        # Which sources use each link / transit each city
+        self.link_users = [set() for _ in self.links]
+        self.city_users = [set() for _ in range(n)]
+        for source in range(n):
+            for v, u in enumerate(self._tables.predecessors[source].tolist()):
+                if u == NO_NODE or u == v:
+                    continue
+                self.city_users[u].add(source)
+                self.link_users[link_number[(min(u, v), max(u, v))]].add(source)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Workers attach to the shared baseline by block name
+        state['_tables'] = self._tables.block_names()
+        del state['baseline']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tables = SharedTables(self.names, np.float64, predecessors=False,
+                                    _blocks={'distances': state['_tables']['distances']})
+        self.baseline = self._tables.distances
+
+    def close(self):
+        """Release the shared baseline matrix."""
+        self.baseline = None
+        self._tables.close()
+
+    @property
+    def num_elements(self):
+        return len(self.links) + len(self.names)
+
+    def describe(self, element):
+        """Return a JSON-friendly description of a failure element."""
+        if element < len(self.links):
+            u, v = self.links[element]
+            return ['link', self.names[u], self.names[v]]
+        return ['city', self.names[element - len(self.links)]]
+
+    def scenarios(self, max_failures=2):
+        """
+        Enumerate failure scenarios as tuples of element ids.
+
+        A link incident to a failed city adds nothing to that failure, so
+        such combinations are skipped.
+        """
+        links = self.links
+        for size in range(1, max_failures + 1):
+            for scenario in itertools.combinations(range(self.num_elements), size):
+                cities = {e - len(links) for e in scenario if e >= len(links)}
+                if any(e < len(links) and (links[e][0] in cities or links[e][1] in cities)
+                       for e in scenario):
+                    continue
+                yield scenario
+
+    def evaluate(self, scenario):
+        """
+        Recompute the sources whose baseline tree uses a failed element.
+
+        Returns:
+            dict: Report with disconnected pairs and latency inflation
+        """
+        n_links = len(self.links)
+        weights = list(self.compact.weights)
+        failed_cities = set()
+        affected = set()
+
+        for element in scenario:
+            if element < n_links:
+                for k in self.link_edges[element]:
+                    weights[k] = INF
+                affected |= self.link_users[element]
+            else:
+                city = element - n_links
+                failed_cities.add(city)
+                for k in self.in_edges[city]:
+                    weights[k] = INF
+                affected |= self.city_users[city]
+
+        disconnected = []
+        inflated = 0
+        total_inflation = 0
+        max_inflation = 0
+        for source in sorted(affected - failed_cities):
+            L, _, _ = shortest_path_tree(self.compact, source, weights=weights)
+            base = self.baseline[source].tolist()
+            for v in range(len(L)):
+                if v in failed_cities or base[v] == INF or L[v] == base[v]:
+                    continue
+                if L[v] == INF:
+                    disconnected.append([self.names[source], self.names[v]])
+                else:
+                    inflation = L[v] - base[v]
+                    if self.integral:
+                        # The shared baseline is float64
+                        inflation = int(inflation)
+                    inflated += 1
+                    total_inflation += inflation
+                    max_inflation = max(max_inflation, inflation)
+
+        return {
+            'failed': [self.describe(e) for e in scenario],
+            'disconnected': disconnected,
+            'inflated_pairs': inflated,
+            'max_inflation': max_inflation,
+            'mean_inflation': total_inflation / inflated if inflated else 0,
+        }
+
+
+def _init_worker(state):
+    global _STATE
+    _STATE = state
+
+
+def _evaluate(scenario):
+    return _STATE.evaluate(scenario)
+
+
+def sweep(graph, max_failures=2, processes=None, chunksize=256):
+    """
+    Evaluate every failure scenario up to max_failures elements.
+
+    The base topology is handed to each worker once at start-up and the
+    baseline distances are shared, not copied; tasks only carry element
+    ids. Scenarios are submitted a bounded window at a time and reports are
+    yielded as they complete, so neither side is held in memory.
+
+    Args:
+        graph: Graph to analyse (non-negative weights)
+        max_failures: 1 for N-1, 2 for N-2
+        processes: Worker count (defaults to the CPU count); 1 runs inline
+        chunksize: Scenarios sent to a worker at a time
+
+    Yields:
+        dict: One report per scenario
+    """
+    processes = processes or os.cpu_count()
+    state = SweepState(graph, processes)
+    scenarios = state.scenarios(max_failures)
+
+    try:
+        if processes == 1:
+            for scenario in scenarios:
+                yield state.evaluate(scenario)
+            return
+
+        window = SWEEP_WINDOW_CHUNKS * processes * chunksize
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(state,)) as pool:
+            while True:
+                batch = list(itertools.islice(scenarios, window))
+                if not batch:
+                    break
+                yield from pool.imap_unordered(_evaluate, batch, chunksize)
+    finally:
+        state.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="N-1 / N-2 failure sweep (JSON Lines report)")
+    parser.add_argument('topology', nargs='?', help="CSV, JSON Lines or snapshot topology (default: built-in network)")
+    parser.add_argument('--max-failures', type=int, default=2)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--output', help="Report file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        from topology_io import load_topology
+        graph = load_topology(args.topology)
+    else:
+        graph = Graph()
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for report in sweep(graph, args.max_failures, args.processes):
+            out.write(json.dumps(report, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Fast-reroute module.
+Precomputes backup routes before failures happen: loop-free alternates (LFA)
+for every source-destination pair, and link/node-disjoint primary + backup
+path pairs. The pairs of one source towards every destination come from a
+single Suurballe-Tarjan pass (one Dijkstra, then one labelling pass on
+reduced costs) and are kept as three int32 arrays per source; the paths
+themselves are rebuilt on demand.
+"""
+
+import heapq
+
+import numpy as np
+
+from routing_table import NO_HOP, RoutingTable
+
+INF = float('inf')
+
+
+class FastReroute:
+    """Backup next hops and disjoint path pairs on top of a routing table."""
+
+    def __init__(self, graph, table=None):
+        """
+        Args:
+            graph: Graph to protect (non-negative weights)
+            table: Optional RoutingTable of the same graph, built if omitted
+        """
+        self.graph = graph
+        self.compact = graph.freeze()
+        self.table = table if table is not None else RoutingTable.build(graph)
+        self.names = self.compact.names
+        self.index = self.compact.index
+
+        self.offsets = list(self.compact.offsets)
+        self.targets = list(self.compact.targets)
+        self.weights = list(self.compact.weights)
+        self.edge_sources = np.repeat(np.arange(len(self.names)), np.diff(self.offsets)).tolist()
+
+        self.lfa = self._loop_free_alternates()
+        # (source id, node_disjoint) -> per-source disjoint-pair arrays
+        self._pairs = {}
+        self._working = {}
+
+    # ------------------------------------------------------------------
+    # Loop-free alternates
+    # ------------------------------------------------------------------
+
+    def _loop_free_alternates(self):
+        """
+        Vectorized LFA selection, one NumPy pass per source.
+
+        A neighbour n of s protects s -> d when D(n, d) < D(n, s) + D(s, d),
+        i.e. its own shortest path to d does not come back through s. The
+        cheapest such neighbour other than the primary next hop is kept.
+
+        Returns:
+            numpy.ndarray: n x n matrix of backup next-hop ids (NO_HOP if none)
+        """
+        D = self.table.distances
+        next_hops = self.table.next_hops
+        n = len(self.names)
+        lfa = np.full((n, n), NO_HOP, dtype=np.int32)
+
+        for s in range(n):
+            # Cheapest edge to each distinct neighbour
+            link_cost = {}
+            for k in range(self.offsets[s], self.offsets[s + 1]):
+                v = self.targets[k]
+                if v != s and self.weights[k] < link_cost.get(v, INF):
+                    link_cost[v] = self.weights[k]
+            if not link_cost:
+                continue
+
+            neighbors = np.fromiter(link_cost, dtype=np.int64, count=len(link_cost))
+            costs = np.fromiter(link_cost.values(), dtype=float, count=len(link_cost))
+
+            via = D[neighbors, :]
+            loop_free = via < D[neighbors, s][:, None] + D[s, :][None, :]
+            loop_free &= neighbors[:, None] != next_hops[s, :][None, :]
+            total = np.where(loop_free, costs[:, None] + via, np.inf)
+
+            best = np.argmin(total, axis=0)
+            protected = np.isfinite(total[best, np.arange(n)])
+            protected[s] = False
+            lfa[s, protected] = neighbors[best[protected]]
+
+        return lfa
+
+    def loop_free_alternate(self, source, destination):
+        """Return the precomputed backup next hop of source towards destination, or None."""
+        hop = self.lfa[self.index[source], self.index[destination]]
+        return self.names[hop] if hop != NO_HOP else None
+
+    # ------------------------------------------------------------------
+    # Disjoint path pairs
+    # ------------------------------------------------------------------
+
+    def disjoint_paths(self, source, destination, node_disjoint=False):
+        """
+        Return the shortest pair of link- (or node-) disjoint paths.
+
+        The pair is rebuilt from the source's precomputed arrays (computed
+        on first use if precompute() did not cover the source).
+
+        Returns:
+            tuple: (shorter path, other path); the second is None when no
+                disjoint pair exists, both are None when unreachable
+        """
+        s, t = self.index[source], self.index[destination]
+        if s == t:
+            return None, None
+        parent, via, via_tail = self._disjoint_arrays(s, node_disjoint)
+        n = len(self.names)
+        root, target = (s + n, t) if node_disjoint else (s, t)
+        if parent[target] == NO_HOP:
+            return None, None
+
+        primary = self._tree_path(parent, root, target)
+        if via[target] == NO_HOP:
+            return self._named(primary, node_disjoint), None
+
+        # Two units of flow root -> target, as tree walks plus one arc per step
+        flow = {}
+        y = target
+        while y != root:
+            v, x = int(via[y]), int(via_tail[y])
+            self._add_walk(flow, parent, v, y)
+            self._add_walk(flow, parent, v, x)
+            flow[(x, y)] = flow.get((x, y), 0) + 1
+            y = v
+
+        successors = {}
+        for (u, v), units in flow.items():
+            # Opposite units on a link cancel out
+            units -= flow.get((v, u), 0)
+            if units > 0:
+                successors.setdefault(u, []).append(v)
+
+        paths = []
+        for _ in range(2):
+            path = [root]
+            while path[-1] != target:
+                path.append(successors[path[-1]].pop())
+            paths.append(self._named(self._without_loops(path), node_disjoint))
+        paths.sort(key=self._path_cost)
+        return paths[0], paths[1]
+
+    def precompute(self, sources=None, node_disjoint=False):
+        """
+        Compute the disjoint-pair arrays of every source.
+
+        Each source costs one Dijkstra and one Suurballe-Tarjan labelling
+        pass covering all its destinations; pairs are rebuilt on demand.
+
+        Args:
+            sources: Iterable of source names; every node by default
+            node_disjoint: Require node-disjoint instead of link-disjoint paths
+        """
+        for source in (self.names if sources is None else sources):
+            self._disjoint_arrays(self.index[source], node_disjoint)
+
+    def backup_path(self, source, destination, failed_link, node_disjoint=False):
+        """
+        Return the route to use once failed_link = (a, b) is down.
+
+        Returns:
+            list: Primary path if it avoids the link, its disjoint partner
+                otherwise, or an empty list if no protected route exists
+        """
+        first, second = self.disjoint_paths(source, destination, node_disjoint)
+        primary = self.table.path(source, destination)
+        down = {tuple(failed_link), tuple(reversed(failed_link))}
+        for candidate in (primary, first, second):
+            if candidate and not any(hop in down for hop in zip(candidate, candidate[1:])):
+                return candidate
+        return []
+
+    def _named(self, path, node_disjoint=False):
+        if node_disjoint:
+            # Keep the "in" copy of every node (ids below n) and the source
+            n = len(self.names)
+            path = [path[0] - n] + [v for v in path[1:] if v < n]
+        return [self.names[v] for v in path]
+
+    def _path_cost(self, path):
+        # Parallel links: a path uses the cheapest one
+        index, compact = self.index, self.compact
+        return sum(min(w for x, w in compact.neighbors(index[u]) if x == index[v]) for u, v in zip(path, path[1:]))
+
+    @staticmethod
+    def _tree_path(parent, root, target):
+        path = [target]
+        while path[-1] != root:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        return path
+
+    @staticmethod
+    def _add_walk(flow, parent, a, b):
+        """Add one unit along the tree walk a -> b (up to the common ancestor, then down)."""
+        ancestors = {}
+        u, steps = a, 0
+        while True:
+            ancestors[u] = steps
+            if parent[u] == u:
+                break
+            u, steps = int(parent[u]), steps + 1
+        down = []
+        u = b
+        while u not in ancestors:
+            down.append(u)
+            u = int(parent[u])
+        top = u
+        # Upwards: tree arcs used backwards cancel one unit
+        u = a
+        while u != top:
+            p = int(parent[u])
+            flow[(p, u)] = flow.get((p, u), 0) - 1
+            u = p
+        for v in down:
+            p = int(parent[v])
+            flow[(p, v)] = flow.get((p, v), 0) + 1
+
+    @staticmethod
+    def _without_loops(path):
+        """Drop the cycles a walk may take through zero reduced-cost arcs."""
+        seen = {}
+        result = []
+        for v in path:
+            if v in seen:
+                del result[seen[v] + 1:]
+                seen = {u: i for i, u in enumerate(result)}
+                continue
+            seen[v] = len(result)
+            result.append(v)
+        return result
+
+    def _working_graph(self, node_disjoint):
+        """
+        Cheapest arc per node pair (a link is a node pair), optionally with
+        every node v split into v (in) -> v + n (out).
+
+        Returns:
+            tuple: (node count, out-arc lists [(head, weight)], in-arc lists [(tail, weight)])
+        """
+        if node_disjoint in self._working:
+            return self._working[node_disjoint]
+        n = len(self.names)
+        cheapest = {}
+        for k, (u, v) in enumerate(zip(self.edge_sources, self.targets)):
+            if u != v and self.weights[k] < cheapest.get((u, v), INF):
+                cheapest[(u, v)] = self.weights[k]
+
+        size = 2 * n if node_disjoint else n
+        out_arcs = [[] for _ in range(size)]
+        in_arcs = [[] for _ in range(size)]
+        for (u, v), w in cheapest.items():
+            if node_disjoint:
+                u += n
+            out_arcs[u].append((v, w))
+            in_arcs[v].append((u, w))
+        if node_disjoint:
+            for v in range(n):
+                out_arcs[v].append((v + n, 0))
+                in_arcs[v + n].append((v, 0))
+        self._working[node_disjoint] = (size, out_arcs, in_arcs)
+        return self._working[node_disjoint]
+
+    def _disjoint_arrays(self, s, node_disjoint):
+        key = (s, node_disjoint)
+        if key not in self._pairs:
+            self._pairs[key] = self._suurballe_tarjan(s + len(self.names) if node_disjoint else s, node_disjoint)
+        return self._pairs[key]
+
+    def _suurballe_tarjan(self, root, node_disjoint):
+        """
+        Shortest disjoint pairs from one root to every node in one pass.
+
+        With reduced costs w'(u, v) = w + d(u) - d(v) (zero on the
+        shortest-path tree), nodes are labelled by increasing pair cost D
+        as in Dijkstra. Labelling v removes it from the tree, splitting the
+        unlabelled part that contained it; each non-tree arc (x, y) whose
+        ends just got separated offers y the pair of v extended by w'(x, y):
+        D(y) <= D(v) + w'(x, y). Only the smaller pieces of a split are
+        relabelled and scanned (they are explored side by side until one
+        piece is left), so every node is scanned O(log n) times.
+
+        Returns:
+            numpy.ndarray: 3 x size int32 rows: tree parent, labelling node v
+                and arc tail x of the best pair of every node (NO_HOP if none)
+        """
+        size, out_arcs, in_arcs = self._working_graph(node_disjoint)
+
+        # Shortest-path tree
+        d = [INF] * size
+        parent = [NO_HOP] * size
+        d[root] = 0
+        parent[root] = root
+        heap = [(0, root)]
+        settled = [False] * size
+        while heap:
+            du, u = heapq.heappop(heap)
+            if settled[u]:
+                continue
+            settled[u] = True
+            for v, w in out_arcs[u]:
+                if du + w < d[v]:
+                    d[v] = du + w
+                    parent[v] = u
+                    heapq.heappush(heap, (du + w, v))
+        children = [[] for _ in range(size)]
+        for v in range(size):
+            if v != root and parent[v] != NO_HOP:
+                children[parent[v]].append(v)
+
+        # Unlabelled tree pieces: every reachable node starts in piece 0
+        piece = [0 if parent[v] != NO_HOP else NO_HOP for v in range(size)]
+        pieces = 1
+        labelled = [False] * size
+        D = [INF] * size
+        via = [NO_HOP] * size
+        via_tail = [NO_HOP] * size
+        heap = [(0, root)]
+        D[root] = 0
+
+        def offer(x, y, w, v, dv):
+            candidate = dv + w + d[x] - d[y]
+            if candidate < D[y]:
+                D[y], via[y], via_tail[y] = candidate, v, x
+                heapq.heappush(heap, (candidate, y))
+
+        while heap:
+            dv, v = heapq.heappop(heap)
+            if labelled[v] or dv > D[v]:
+                continue
+            labelled[v] = True
+
+            # Explore the pieces left by removing v side by side
+            starts = [c for c in children[v] if not labelled[c]]
+            if v != root and not labelled[parent[v]]:
+                starts.append(parent[v])
+            stacks = [[u] for u in starts]
+            found = [[] for _ in starts]
+            seen = set(starts)
+            active = list(range(len(starts)))
+            while len(active) > 1:
+                still = []
+                for i in active:
+                    stack = stacks[i]
+                    u = stack.pop()
+                    found[i].append(u)
+                    neighbors = children[u] if u == root else children[u] + [parent[u]]
+                    for w in neighbors:
+                        if not labelled[w] and w not in seen:
+                            seen.add(w)
+                            stack.append(w)
+                    if stack:
+                        still.append(i)
+                active = still
+            if active:
+                keep = active[0]
+            else:
+                keep = max(range(len(starts)), key=lambda i: len(found[i])) if starts else None
+
+            moved = []
+            for i in range(len(starts)):
+                if i == keep:
+                    continue
+                pieces += 1
+                for u in found[i]:
+                    piece[u] = pieces
+                moved.extend(found[i])
+
+            for y, w in out_arcs[v]:
+                if not labelled[y] and piece[y] != NO_HOP and parent[y] != v:
+                    offer(v, y, w, v, dv)
+            for x in moved:
+                for y, w in out_arcs[x]:
+                    if not labelled[y] and piece[y] != NO_HOP and piece[y] != piece[x] and parent[y] != x:
+                        offer(x, y, w, v, dv)
+                for u, w in in_arcs[x]:
+                    if not labelled[u] and piece[u] != NO_HOP and piece[u] != piece[x] and parent[x] != u:
+                        offer(u, x, w, v, dv)
+
+        return np.array([parent, via, via_tail], dtype=np.int32)
@@ -0,0 +1,253 @@
+"""
+Forwarding table module.
+Compiles per-node FIBs (destination -> next hop, cost) for every node of a
+Graph from one pass of all-sources shortest-path trees, and turns a failure
+set into the minimal per-node diff to push to the edge devices: only the
+trees that route over a failed link or through a failed city are repaired,
+only below the failure, and only the entries that actually change are
+emitted.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from all_sources import NO_NODE, all_sources
+from batch_queries import BatchState
+from dynamic_sp import repair_subtree
+from graph_algorithms import Graph
+
+INF = float('inf')
+
+
+class FailureState:
+    """Routing state under a failure set: rows that differ from the baseline."""
+
+    def __init__(self, failed_cities=(), failed_links=(), rows=None):
+        """
+        Args:
+            failed_cities: Down node ids
+            failed_links: Down links as (id, id) pairs
+            rows: {node id: (distance row, next-hop row)} recomputed trees
+        """
+        self.failed_cities = frozenset(failed_cities)
+        self.failed_links = frozenset(frozenset(link) for link in failed_links)
+        self.rows = rows or {}
+
+
+class ForwardingTables:
+    """Baseline FIBs of every node, and their diffs under failures."""
+
+    def __init__(self, graph, processes=None):
+        """
+        Args:
+            graph: Graph to route on (non-negative weights)
+            processes: Worker count of the baseline all-sources pass
+        """
+        self.state = BatchState(graph)
+        self.names = self.state.names
+        self.index = self.state.index
+        self.integral = all(isinstance(w, int) for w in self.state.compact.weights)
+        offsets = self.state.compact.offsets
+        self.edge_sources = np.repeat(np.arange(len(self.names)), np.diff(offsets)).tolist()
+
+        tables = all_sources(graph, processes, distance_dtype=np.float64, next_hops=True)
+        # Only this process reads the tables: they go away with this object
+        tables.unlink()
+        self._tables = tables
+        self.distances = tables.distances
+        self.next_hops = tables.next_hops
+        self.predecessors = tables.predecessors
+        self.baseline = FailureState()
+
+    def failure_state(self, failed_cities=(), failed_links=()):
+        """
+        Repair the trees affected by a failure set.
+
+        A tree is affected when it uses a failed link or transits a failed
+        city. Only the subtree below the failure is recomputed, every other
+        route keeps its baseline next hop, so equal-cost ties never show up
+        as spurious changes.
+
+        Args:
+            failed_cities: Node names taken down
+            failed_links: (a, b) node name pairs taken down (both directions)
+
+        Returns:
+            FailureState: State to pass to fib() and diff()
+        """
+        for node in (*failed_cities, *(node for link in failed_links for node in link)):
+            if node not in self.index:
+                raise ValueError(f"Node {node} not in graph")
+        cities = {self.index[city] for city in failed_cities}
+        links = {tuple(sorted((self.index[a], self.index[b]))) for a, b in failed_links}
+
+        P = self.predecessors
+        affected = np.zeros(len(self.names), dtype=bool)
+        for a, b in links:
+            affected |= (P[:, b] == a) | (P[:, a] == b)
+        for city in cities:
+            # Also flags the city's own row, whose root is the city itself
+            affected |= (P == city).any(axis=1)
+
+        rows = {}
+        sources = [int(s) for s in np.flatnonzero(affected) if s not in cities]
+        if sources:
+            weights = self._failure_weights(cities, links)
+            for source in sources:
+                rows[source] = self._repair(source, cities, links, weights)
+        return FailureState(cities, links, rows)
+
+    def _failure_weights(self, cities, links):
+        weights = list(self.state.compact.weights)
+        for city in cities:
+            for k in self.state.in_edges[city]:
+                weights[k] = INF
+        for link in links:
+            for k in self.state.link_edges.get(frozenset(link), ()):
+                weights[k] = INF
+        return weights
+
+    def _repair(self, source, cities, links, weights):
+        """
+        Recompute the part of one baseline tree cut off by the failures.
+
+        Returns:
+            tuple: (distance row, next-hop row) under the failures
+        """
+        n = len(self.names)
+        parents = self.predecessors[source]
+
+        # Cut points: heads of failed tree edges and failed cities
+        cut = np.zeros(n, dtype=bool)
+        for a, b in links:
+            cut[b] |= parents[b] == a
+            cut[a] |= parents[a] == b
+        cut[list(cities)] = True
+
+        # Everything below a cut point, by pointer doubling up the tree
+        ancestors = np.where(parents == NO_NODE, np.arange(n), parents)
+        below = cut
+        for _ in range(max(1, n.bit_length())):
+            below = below | below[ancestors]
+            ancestors = ancestors[ancestors]
+
+        distances = self.distances[source].tolist()
+        hops = self.next_hops[source].tolist()
+        lost = np.flatnonzero(below).tolist()
+        for v in lost:
+            distances[v], hops[v] = INF, NO_NODE
+        lost = {v for v in lost if v not in cities}
+
+        compact = self.state.compact
+        repaired = repair_subtree(lost, distances, weights, compact.offsets, compact.targets, self.state.in_edges,
+                                  self.edge_sources, lambda k: weights[k] < INF)
+        # Settle order: a parent's next hop is known before its children's
+        for v, (d, parent, _) in repaired.items():
+            distances[v] = d
+            hops[v] = v if parent == source else hops[parent]
+
+        return np.asarray(distances, dtype=np.float64), np.asarray(hops, dtype=np.int32)
+
+    def _row(self, state, node):
+        """Distance and next-hop rows of a node, failed destinations removed."""
+        distances, hops = state.rows.get(node, (self.distances[node], self.next_hops[node]))
+        if state.failed_cities:
+            down = list(state.failed_cities)
+            distances, hops = distances.copy(), hops.copy()
+            distances[down], hops[down] = np.inf, NO_NODE
+        return distances, hops
+
+    def _entry(self, distances, hops, destination):
+        if hops[destination] == NO_NODE:
+            return None
+        cost = float(distances[destination])
+        return self.names[hops[destination]], int(cost) if self.integral else cost
+
+    def fib(self, node, state=None):
+        """
+        Forwarding table of one node.
+
+        Returns:
+            dict: {destination: (next hop, cost)} for every reachable
+                destination other than the node itself (empty if it is down)
+        """
+        state = state or self.baseline
+        u = self.index[node]
+        if u in state.failed_cities:
+            return {}
+        distances, hops = self._row(state, u)
+        return {self.names[v]: self._entry(distances, hops, v)
+                for v in np.flatnonzero(hops != NO_NODE).tolist() if v != u}
+
+    def diff(self, new, old=None):
+        """
+        Minimal per-node FIB changes from one state to another.
+
+        Nodes down in the new state get nothing; a node coming back up gets
+        its whole table.
+
+        Args:
+            new: Target FailureState
+            old: Current FailureState (default: the intact network)
+
+        Returns:
+            dict: {node: {destination: (next hop, cost) or None to withdraw}}
+        """
+        old = old or self.baseline
+        empty = (np.full(len(self.names), np.inf), np.full(len(self.names), NO_NODE, dtype=np.int32))
+        changes = {}
+
+        # Rows whose tree differs between the states: compare whole rows
+        recomputed = set(new.rows) | set(old.rows) | old.failed_cities
+        for u in sorted(recomputed - new.failed_cities):
+            old_distances, old_hops = empty if u in old.failed_cities else self._row(old, u)
+            new_distances, new_hops = self._row(new, u)
+            changed = np.flatnonzero((old_hops != new_hops) | (old_distances != new_distances))
+            entries = {self.names[v]: self._entry(new_distances, new_hops, v) for v in changed.tolist() if v != u}
+            if entries:
+                changes[self.names[u]] = entries
+
+        # Every other row keeps its tree: only destinations going down or up change
+        toggled = sorted(new.failed_cities ^ old.failed_cities)
+        if toggled:
+            for u in range(len(self.names)):
+                if u in recomputed or u in new.failed_cities:
+                    continue
+                entries = {}
+                for v in toggled:
+                    if v == u or self.next_hops[u, v] == NO_NODE:
+                        continue
+                    entries[self.names[v]] = (None if v in new.failed_cities
+                                              else self._entry(self.distances[u], self.next_hops[u], v))
+                if entries:
+                    changes.setdefault(self.names[u], {}).update(entries)
+        return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-node forwarding tables and failure diffs (JSON)")
+    parser.add_argument('--topology', help="CSV, JSON Lines or snapshot topology (default: built-in network)")
+    parser.add_argument('--fail-city', action='append', default=[], metavar='NODE')
+    parser.add_argument('--fail-link', action='append', nargs=2, default=[], metavar=('A', 'B'))
+    parser.add_argument('--node', help="Print this node's full table under the failures instead of the diff")
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        from topology_io import load_topology
+        graph = load_topology(args.topology)
+    else:
+        graph = Graph()
+
+    tables = ForwardingTables(graph, args.processes)
+    state = tables.failure_state(args.fail_city, args.fail_link)
+    result = tables.fib(args.node, state) if args.node else tables.diff(state)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -3,39 +3,386 @@ Graph algorithms module for shortest path calculations.
 Contains implementations of Dijkstra and Bellman-Ford algorithms.
 """
 
-class Graph:
-    """Graph representation with nodes and weighted edges."""
+import heapq
+import itertools
+import json
+import logging
+import time
+from collections import deque
+
+from compact_graph import CompactGraph
+
+
+# Topology versions are unique across all Graph instances of the process
+_topology_versions = itertools.count(1)
+
+# One JSON object per instrumented query, at INFO level
+stats_logger = logging.getLogger('graph_algorithms.stats')
+
+# Default topology: Moroccan city network
+# Bidirectional graph - all edges work in both directions
+DEFAULT_GRAPH = {
+    'A': [('M', 20), ('S', 28), ('C', 36), ('B', 25)],
+    'B': [('M', 16), ('S', 24), ('F', 28), ('A', 25)],
+    'C': [('M', 30), ('R', 11), ('T', 27), ('A', 36)],
+    'R': [('M', 22), ('F', 14), ('C', 11)],
+    'T': [('F', 22), ('H', 35), ('C', 27)],
+    'F': [('H', 30), ('O', 42), ('B', 28), ('R', 14), ('T', 22)],
+    'H': [('O', 11), ('F', 30), ('T', 35)],
+    'M': [('A', 20), ('B', 16), ('C', 30), ('R', 22)],
+    'S': [('A', 28), ('B', 24)],
+    'O': [('F', 42), ('H', 11)]
+}
+
+# Full city names
+DEFAULT_CITY_NAMES = {
+    'A': 'Agadir',
+    'B': 'Béni Mellal',
+    'C': 'Casablanca',
+    'F': 'Fès',
+    'H': 'Hoceima',
+    'M': 'Marrakech',
+    'O': 'Oujda',
+    'R': 'Rabat',
+    'S': 'Safi',
+    'T': 'Tanger'
+}
+
+# Optimised drawing positions of the cities
+DEFAULT_POSITIONS = {
+    'C': (-5, 0), 'R': (-3, 2.5), 'M': (-3, -5.5), 'T': (-4, 4.5),
+    'A': (1, -5), 'F': (2, 0), 'H': (3, 2.5), 'B': (3.5, -6.2),
+    'S': (2, -3.5), 'O': (5, 0)
+}
+
+
+class NegativeCycleError(ValueError):
+    """Raised when a negative cycle is reachable from the source node."""
+    
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Negative cycle reachable from source: {' -> '.join(map(str, cycle))}")
+
+
+class QueryStats:
+    """
+    Counters and timers of one instrumented query.
+    
+    Pass an instance as `stats=` to a Graph algorithm to fill it; without
+    one, the uninstrumented code path runs and nothing is counted. Counters
+    an algorithm does not track stay None.
+    """
+    
+    FIELDS = ('algorithm', 'source', 'target', 'nodes_settled', 'edges_relaxed', 'heap_pushes',
+              'heap_pops', 'passes', 'seconds', 'reconstruct_seconds', 'path_length', 'cached')
     
     def __init__(self):
-        # Bidirectional graph - all edges work in both directions
-        self.graph = {
-            'A': [('M', 20), ('S', 28), ('C', 36), ('B', 25)],
-            'B': [('M', 16), ('S', 24), ('F', 28), ('A', 25)],
-            'C': [('M', 30), ('R', 11), ('T', 27), ('A', 36)],
-            'R': [('M', 22), ('F', 14), ('C', 11)],
-            'T': [('F', 22), ('H', 35), ('C', 27)],
-            'F': [('H', 30), ('O', 42), ('B', 28), ('R', 14), ('T', 22)],
-            'H': [('O', 11), ('F', 30), ('T', 35)],
-            'M': [('A', 20), ('B', 16), ('C', 30), ('R', 22)],
-            'S': [('A', 28), ('B', 24)],
-            'O': [('F', 42), ('H', 11)]
-        }
-        self.nodes = list(self.graph.keys())
+        for field in self.FIELDS:
+            setattr(self, field, None)
+    
+    def as_dict(self):
+        """Return the counters as a plain dict."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+    
+    def to_json(self):
+        """Return the counters as one JSON object."""
+        return json.dumps(self.as_dict(), ensure_ascii=False, default=str)
+    
+    def log(self):
+        """Emit the counters on the graph_algorithms.stats logger."""
+        if stats_logger.isEnabledFor(logging.INFO):
+            stats_logger.info(self.to_json())
+
+
+def shortest_path_tree(compact, source_idx, target_idx=-1, weights=None):
+    """
+    Heap-based Dijkstra on node ids of a CompactGraph.
+    
+    Args:
+        compact: CompactGraph with non-negative weights
+        source_idx: Starting node id
+        target_idx: Optional node id at which the search stops once settled
+        weights: Optional per-edge weights overriding compact.weights; an
+            infinite weight removes the edge (used to model failures)
+        
+    Returns:
+        tuple: (distance list, predecessor id list, settled ids in order)
+    """
+    offsets, targets = compact.offsets, compact.targets
+    if weights is None:
+        weights = compact.weights
+    n = compact.num_nodes
+    
+    # Initialize
+    L = [float('inf')] * n
+    P = [None] * n
+    M = [False] * n
+    order = []
+    
+    L[source_idx] = 0
+    P[source_idx] = source_idx
+    heap = [(0, source_idx)]
+    
+    while heap:
+        distance, current = heapq.heappop(heap)
+        
+        # Stale entry left behind by a later, shorter push
+        if M[current]:
+            continue
+        M[current] = True
+        order.append(current)
+        
+        if current == target_idx:
+            break
+        
+        # Update neighbors
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor_idx = targets[k]
+            
+            if not M[neighbor_idx]:
+                new_distance = distance + weights[k]
+                if new_distance < L[neighbor_idx]:
+                    L[neighbor_idx] = new_distance
+                    P[neighbor_idx] = current
+                    heapq.heappush(heap, (new_distance, neighbor_idx))
+    
+    return L, P, order
+
+
+def shortest_path_tree_counted(compact, source_idx, stats, target_idx=-1, weights=None):
+    """
+    Instrumented copy of shortest_path_tree, kept separate so the plain
+    kernel carries no counters.
+    
+    Fills stats.nodes_settled, edges_relaxed, heap_pushes and heap_pops.
+    """
+    offsets, targets = compact.offsets, compact.targets
+    if weights is None:
+        weights = compact.weights
+    n = compact.num_nodes
+    
+    L = [float('inf')] * n
+    P = [None] * n
+    M = [False] * n
+    order = []
+    pushes, pops, relaxed = 1, 0, 0
+    
+    L[source_idx] = 0
+    P[source_idx] = source_idx
+    heap = [(0, source_idx)]
+    
+    while heap:
+        distance, current = heapq.heappop(heap)
+        pops += 1
+        
+        if M[current]:
+            continue
+        M[current] = True
+        order.append(current)
+        
+        if current == target_idx:
+            break
+        
+        start, end = offsets[current], offsets[current + 1]
+        relaxed += end - start
+        for k in range(start, end):
+            neighbor_idx = targets[k]
+            
+            if not M[neighbor_idx]:
+                new_distance = distance + weights[k]
+                if new_distance < L[neighbor_idx]:
+                    L[neighbor_idx] = new_distance
+                    P[neighbor_idx] = current
+                    heapq.heappush(heap, (new_distance, neighbor_idx))
+                    pushes += 1
+    
+    stats.nodes_settled = len(order)
+    stats.edges_relaxed = relaxed
+    stats.heap_pushes = pushes
+    stats.heap_pops = pops
+    return L, P, order
+
+
+def shortest_path_dag(compact, source_idx, target_idx=-1, weights=None):
+    """
+    Heap-based Dijkstra keeping every tight predecessor edge (ECMP).
+    
+    An edge u -> v is kept when L[u] + w == L[v]; ties are exact, so they
+    show up with integer (or otherwise exactly representable) latencies.
+    Only edges from nodes settled earlier are kept, so the settle order is a
+    topological order of the DAG even with zero-weight edges.
+    
+    Args:
+        compact: CompactGraph with non-negative weights
+        source_idx: Starting node id
+        target_idx: Optional node id at which the search stops once settled
+        weights: Optional per-edge weights overriding compact.weights
+        
+    Returns:
+        tuple: (distance list, list of tight in-edge ids per node, settled
+            ids in order)
+    """
+    offsets, targets = compact.offsets, compact.targets
+    if weights is None:
+        weights = compact.weights
+    n = compact.num_nodes
+    
+    L = [float('inf')] * n
+    D = [[] for _ in range(n)]
+    M = [False] * n
+    order = []
+    
+    L[source_idx] = 0
+    heap = [(0, source_idx)]
+    
+    while heap:
+        distance, current = heapq.heappop(heap)
+        
+        if M[current]:
+            continue
+        M[current] = True
+        order.append(current)
+        
+        if current == target_idx:
+            break
+        
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor_idx = targets[k]
+            
+            if not M[neighbor_idx]:
+                new_distance = distance + weights[k]
+                if new_distance < L[neighbor_idx]:
+                    L[neighbor_idx] = new_distance
+                    D[neighbor_idx] = [k]
+                    heapq.heappush(heap, (new_distance, neighbor_idx))
+                elif new_distance == L[neighbor_idx] and new_distance != float('inf'):
+                    # Equal-cost alternative: no new heap entry needed
+                    D[neighbor_idx].append(k)
+    
+    return L, D, order
+
+
+class Graph:
+    """
+    Graph representation with nodes and weighted edges.
+    
+    The adjacency dict in `graph` is the mutable builder; algorithms run on a
+    CompactGraph (CSR) snapshot that is frozen lazily and dropped whenever the
+    topology changes through `graph = ...`, `add_edge`, `remove_edge` or
+    `invalidate()` (call the latter after editing adjacency lists in place).
+    Each of those also moves `version` to a new, process-wide unique value.
+    """
+    
+    def __init__(self, adjacency=None, city_names=None, positions=None):
+        """
+        Args:
+            adjacency: Optional adjacency dict {node: [(neighbor, weight), ...]};
+                defaults to the Moroccan city network
+            city_names: Optional dict of full node names
+            positions: Optional dict of node coordinates (x, y)
+        """
+        if adjacency is None:
+            adjacency = {node: list(neighbors) for node, neighbors in DEFAULT_GRAPH.items()}
+            city_names = dict(DEFAULT_CITY_NAMES) if city_names is None else city_names
+            positions = dict(DEFAULT_POSITIONS) if positions is None else positions
+        
+        self.graph = adjacency
+        self.city_names = city_names or {}
+        self.positions = positions or {}
+    
+    @classmethod
+    def from_compact(cls, compact, city_names=None, positions=None):
+        """
+        Wrap an existing CompactGraph without building the adjacency dict.
+        
+        The dict builder is only thawed if `graph` is accessed.
+        """
+        graph = cls.__new__(cls)
+        graph._adjacency = None
+        graph._compact = compact
+        graph.version = next(_topology_versions)
+        graph.nodes = list(compact.names)
+        graph.node_index = dict(compact.index)
+        graph.city_names = city_names or {}
+        graph.positions = positions or {}
+        return graph
+    
+    @property
+    def graph(self):
+        """Mutable adjacency dict {node: [(neighbor, weight), ...]}."""
+        if self._adjacency is None:
+            self._adjacency = self._compact.to_adjacency()
+        return self._adjacency
+    
+    @graph.setter
+    def graph(self, adjacency):
+        self._adjacency = adjacency
+        self.invalidate()
+    
+    def invalidate(self):
+        """Drop the frozen compact form after the adjacency has changed."""
+        adjacency = self.graph
+        self._compact = None
+        self.version = next(_topology_versions)
+        self.nodes = list(adjacency.keys())
+        seen = set(self.nodes)
+        for neighbors in adjacency.values():
+            for neighbor, _ in neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    self.nodes.append(neighbor)
         self.node_index = {node: i for i, node in enumerate(self.nodes)}
+    
+    def freeze(self):
+        """Return the CompactGraph (CSR) form of the current topology."""
+        if self._compact is None:
+            self._compact = CompactGraph.from_adjacency(self._adjacency)
+        return self._compact
+    
+    def add_edge(self, source, destination, weight):
+        """Add a directed edge source -> destination."""
+        self.graph.setdefault(source, []).append((destination, weight))
+        self.invalidate()
+    
+    def remove_edge(self, source, destination):
+        """Remove every directed edge source -> destination."""
+        adjacency = self.graph
+        if source in adjacency:
+            adjacency[source] = [(neighbor, weight) for neighbor, weight in adjacency[source]
+                                 if neighbor != destination]
+        self.invalidate()
+    
+    def update_weights(self, updates):
+        """
+        Change link latencies without rebuilding the CSR structure.
         
-        # Full city names
-        self.city_names = {
-            'A': 'Agadir',
-            'B': 'Béni Mellal',
-            'C': 'Casablanca',
-            'F': 'Fès',
-            'H': 'Hoceima',
-            'M': 'Marrakech',
-            'O': 'Oujda',
-            'R': 'Rabat',
-            'S': 'Safi',
-            'T': 'Tanger'
-        }
+        Every edge source -> destination gets the new weight. The compact
+        form is replaced by a copy sharing its offsets and targets (holders
+        of the previous one keep a consistent, older topology), the version
+        moves (cached trees become stale) and the adjacency dict is thawed
+        again from the compact form on its next access.
+        
+        Args:
+            updates: Iterable of (source, destination, weight)
+            
+        Returns:
+            list: Edge ids that were updated
+        """
+        compact = self.freeze()
+        index, offsets, targets = compact.index, compact.offsets, compact.targets
+        edge_ids, weights = [], []
+        for source, destination, weight in updates:
+            u, v = index[source], index[destination]
+            for k in range(offsets[u], offsets[u + 1]):
+                if targets[k] == v:
+                    edge_ids.append(k)
+                    weights.append(weight)
+        
+        self._compact = compact.with_weights(edge_ids, weights)
+        self._adjacency = None
+        self._router = None
+        self.version = next(_topology_versions)
+        return edge_ids
     
     def get_nodes(self):
         """Return list of all nodes."""
@@ -46,94 +393,96 @@ class Graph:
         return self.city_names.get(code, code)
     
     def get_city_names_dict(self):
-        """Return dictionary of city names."""
-        return self.city_names.copy()
+        """Return dictionary of city names (the code itself when no name is known)."""
+        return {node: self.city_names.get(node, node) for node in self.nodes}
+    
+    def get_positions(self):
+        """Return dictionary of node coordinates (x, y); empty if none were loaded."""
+        return self.positions.copy()
     
     def get_edges(self):
         """Return list of all edges as tuples (source, destination, weight)."""
-        edges = []
-        for source, neighbors in self.graph.items():
-            for dest, weight in neighbors:
-                edges.append((source, dest, weight))
-        return edges
+        compact = self.freeze()
+        names = compact.names
+        return [(names[u], names[v], weight) for u, v, weight in compact.edges()]
     
-    def dijkstra(self, source_node):
+    def dijkstra(self, source_node, target=None, stats=None, ecmp=False):
         """
-        Dijkstra's algorithm for shortest path.
+        Dijkstra's algorithm for shortest path (binary heap, lazy deletion).
         
         Args:
             source_node: Starting node name
+            target: Optional destination; the search stops as soon as it is
+                settled, so only nodes settled before it have final distances
+            stats: Optional QueryStats to fill (runs the instrumented kernel)
+            ecmp: Keep every equal-cost predecessor instead of the first one
+                found (same single pass)
             
         Returns:
-            tuple: (distances dict, predecessors dict)
+            tuple: (distances dict, predecessors dict); with ecmp, each
+                predecessor entry is the list of tight predecessors of the
+                node (empty for the source and unreachable nodes)
         """
-        if source_node not in self.nodes:
+        if source_node not in self.node_index:
             raise ValueError(f"Node {source_node} not in graph")
+        if target is not None and target not in self.node_index:
+            raise ValueError(f"Node {target} not in graph")
         
-        n = len(self.graph)
-        source_idx = self.node_index[source_node]
-        
-        # Initialize
-        L = [float('inf')] * n
-        P = [None] * n
-        M = [False] * n
-        
-        L[source_idx] = 0
-        P[source_idx] = source_idx
-        current = source_idx
+        compact = self.freeze()
+        source_idx = compact.index[source_node]
+        target_idx = compact.index[target] if target is not None else -1
         
-        while True:
-            M[current] = True
-            
-            # Update neighbors
-            for neighbor_node, weight in self.graph[self.nodes[current]]:
-                neighbor_idx = self.node_index[neighbor_node]
-                
-                if not M[neighbor_idx]:
-                    new_distance = L[current] + weight
-                    if new_distance < L[neighbor_idx]:
-                        L[neighbor_idx] = new_distance
-                        P[neighbor_idx] = current
-            
-            # Find next unvisited node with minimum distance
-            min_distance = float('inf')
-            next_node = -1
-            
-            for i in range(n):
-                if not M[i] and L[i] < min_distance:
-                    min_distance = L[i]
-                    next_node = i
-            
-            if next_node == -1:
-                break
-            
-            current = next_node
+        if ecmp:
+            start = self._start_stats(stats, 'dijkstra_ecmp', source_node, target) if stats is not None else None
+            L, D, order = shortest_path_dag(compact, source_idx, target_idx)
+            names, offsets = compact.names, compact.offsets
+            edge_sources = [u for u in range(compact.num_nodes) for _ in range(offsets[u], offsets[u + 1])]
+            predecessors = {names[v]: list(dict.fromkeys(names[edge_sources[k]] for k in D[v]))
+                            for v in range(compact.num_nodes)}
+            if stats is not None:
+                stats.nodes_settled = len(order)
+                self._finish_stats(stats, start)
+            return dict(zip(names, L)), predecessors
         
-        # Convert to dictionary format
-        distances = {self.nodes[i]: L[i] for i in range(n)}
-        predecessors = {self.nodes[i]: (self.nodes[P[i]] if P[i] is not None else None) for i in range(n)}
+        if stats is None:
+            L, P, _ = shortest_path_tree(compact, source_idx, target_idx)
+            return self._to_dicts(compact, L, P)
         
-        return distances, predecessors
+        start = self._start_stats(stats, 'dijkstra', source_node, target)
+        L, P, _ = shortest_path_tree_counted(compact, source_idx, stats, target_idx)
+        result = self._to_dicts(compact, L, P)
+        self._finish_stats(stats, start)
+        return result
     
-    def bellman_ford(self, source_node):
+    def bellman_ford(self, source_node, stats=None):
         """
         Bellman-Ford algorithm for shortest path.
         
         Args:
             source_node: Starting node name
+            stats: Optional QueryStats to fill (passes and edges relaxed)
             
         Returns:
             tuple: (distances dict, predecessors dict)
+            
+        Raises:
+            NegativeCycleError: If a negative cycle is reachable from the source
         """
-        if source_node not in self.nodes:
+        if source_node not in self.node_index:
             raise ValueError(f"Node {source_node} not in graph")
         
+        start = self._start_stats(stats, 'bellman_ford', source_node) if stats is not None else None
+        compact = self.freeze()
+        offsets, targets, weights = compact.offsets, compact.targets, compact.weights
+        n = compact.num_nodes
+        source_idx = compact.index[source_node]
+        
         # Initialize
-        distances = {node: float('inf') for node in self.graph}
-        predecessors = {node: None for node in self.graph}
+        L = [float('inf')] * n
+        P = [None] * n
         
-        distances[source_node] = 0
-        predecessors[source_node] = source_node
+        L[source_idx] = 0
+        P[source_idx] = source_idx
         
         # Relax edges
         continue_flag = True
@@ -143,20 +492,211 @@ class Graph:
             continue_flag = False
             iterations += 1
             
-            for node in self.graph:
-                for neighbor, weight in self.graph[node]:
-                    if distances[node] + weight < distances[neighbor]:
-                        distances[neighbor] = distances[node] + weight
-                        predecessors[neighbor] = node
+            for node in range(n):
+                for k in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[k]
+                    if L[node] + weights[k] < L[neighbor]:
+                        L[neighbor] = L[node] + weights[k]
+                        P[neighbor] = node
                         continue_flag = True
+                        changed = neighbor
             
-            # Prevent infinite loops
-            if iterations > len(self.nodes):
-                break
+            # A change in the n-th pass means a negative cycle
+            if continue_flag and iterations >= n:
+                if stats is not None:
+                    self._finish_bellman_ford_stats(stats, start, iterations, compact)
+                raise NegativeCycleError(self._extract_cycle(compact, P, changed))
+        
+        result = self._to_dicts(compact, L, P)
+        if stats is not None:
+            # Every pass scans every edge: the counts need no inner-loop counter
+            self._finish_bellman_ford_stats(stats, start, iterations, compact)
+        return result
+    
+    def spfa(self, source_node, stats=None):
+        """
+        Queue-based Bellman-Ford (SPFA): only edges leaving nodes whose
+        distance changed are relaxed again.
+        
+        Args:
+            source_node: Starting node name
+            stats: Optional QueryStats to fill (edges relaxed)
+            
+        Returns:
+            tuple: (distances dict, predecessors dict, number of edge relaxations)
+            
+        Raises:
+            NegativeCycleError: If a negative cycle is reachable from the source
+        """
+        if source_node not in self.node_index:
+            raise ValueError(f"Node {source_node} not in graph")
+        
+        started = self._start_stats(stats, 'spfa', source_node) if stats is not None else None
+        compact = self.freeze()
+        offsets, targets, weights = compact.offsets, compact.targets, compact.weights
+        n = compact.num_nodes
+        source_idx = compact.index[source_node]
+        
+        # Initialize
+        L = [float('inf')] * n
+        P = [None] * n
+        hops = [0] * n
+        in_queue = [False] * n
         
+        L[source_idx] = 0
+        P[source_idx] = source_idx
+        queue = deque([source_idx])
+        in_queue[source_idx] = True
+        relaxations = 0
+        
+        try:
+            while queue:
+                node = queue.popleft()
+                in_queue[node] = False
+                node_distance = L[node]
+                start, end = offsets[node], offsets[node + 1]
+                relaxations += end - start
+                
+                for k in range(start, end):
+                    neighbor = targets[k]
+                    new_distance = node_distance + weights[k]
+                    if new_distance < L[neighbor]:
+                        L[neighbor] = new_distance
+                        P[neighbor] = node
+                        
+                        # A shortest path never needs n edges
+                        hops[neighbor] = hops[node] + 1
+                        if hops[neighbor] >= n:
+                            raise NegativeCycleError(self._extract_cycle(compact, P, neighbor))
+                        
+                        if not in_queue[neighbor]:
+                            in_queue[neighbor] = True
+                            queue.append(neighbor)
+            
+            distances, predecessors = self._to_dicts(compact, L, P)
+        finally:
+            # Negative-cycle runs are recorded too
+            if stats is not None:
+                stats.edges_relaxed = relaxations
+                self._finish_stats(stats, started)
+        return distances, predecessors, relaxations
+    
+    @staticmethod
+    def _extract_cycle(compact, P, start):
+        """Walk predecessors from a node known to lead into a negative cycle."""
+        node = start
+        for _ in range(compact.num_nodes):
+            node = P[node]
+        
+        cycle = [node]
+        current = P[node]
+        while current != node:
+            cycle.append(current)
+            current = P[current]
+        cycle.append(node)
+        cycle.reverse()
+        return [compact.names[i] for i in cycle]
+    
+    @staticmethod
+    def _to_dicts(compact, L, P):
+        """Convert id-indexed distance/predecessor lists to name-keyed dicts."""
+        names = compact.names
+        distances = dict(zip(names, L))
+        predecessors = {names[i]: (names[p] if p is not None else None) for i, p in enumerate(P)}
         return distances, predecessors
     
-    def reconstruct_path(self, predecessors, source, destination):
+    @staticmethod
+    def _start_stats(stats, algorithm, source, target=None):
+        stats.algorithm = algorithm
+        stats.source = source
+        stats.target = target
+        return time.perf_counter()
+    
+    @staticmethod
+    def _finish_stats(stats, start):
+        stats.seconds = time.perf_counter() - start
+        stats.log()
+    
+    def _finish_bellman_ford_stats(self, stats, start, passes, compact):
+        stats.passes = passes
+        stats.edges_relaxed = passes * compact.num_edges
+        self._finish_stats(stats, start)
+    
+    def astar(self, source_node, target, heuristic='auto', stats=None):
+        """
+        A* search for a single source -> target query.
+        
+        Args:
+            source_node: Starting node name
+            target: Destination node name
+            heuristic: 'coordinates' (node positions), 'landmarks' (ALT) or
+                'auto' (coordinates when every node has a position)
+            stats: Optional QueryStats to fill (settled nodes and time)
+            
+        Returns:
+            tuple: (distance, path list, number of settled nodes)
+        """
+        if stats is None:
+            return self._point_to_point_router().astar(source_node, target, heuristic)
+        start = self._start_stats(stats, 'astar', source_node, target)
+        result = self._point_to_point_router().astar(source_node, target, heuristic)
+        stats.nodes_settled = result[2]
+        stats.path_length = len(result[1])
+        self._finish_stats(stats, start)
+        return result
+    
+    def bidirectional_dijkstra(self, source_node, target, stats=None):
+        """
+        Bidirectional Dijkstra for a single source -> target query.
+        
+        Returns:
+            tuple: (distance, path list, number of settled nodes)
+        """
+        if stats is None:
+            return self._point_to_point_router().bidirectional_dijkstra(source_node, target)
+        start = self._start_stats(stats, 'bidirectional_dijkstra', source_node, target)
+        result = self._point_to_point_router().bidirectional_dijkstra(source_node, target)
+        stats.nodes_settled = result[2]
+        stats.path_length = len(result[1])
+        self._finish_stats(stats, start)
+        return result
+    
+    def k_shortest_paths(self, source_node, target, k):
+        """
+        Yen's k shortest loopless paths, by increasing latency.
+        
+        Args:
+            source_node: Starting node name
+            target: Destination node name
+            k: Maximum number of paths
+            
+        Returns:
+            list: (total latency, [(from_node, to_node, weight), ...]) tuples,
+                hops in the format of get_path_with_weights
+        """
+        from k_shortest_paths import k_shortest_paths
+        
+        return k_shortest_paths(self, source_node, target, k)
+    
+    def shortest_path_dag(self, source_node):
+        """
+        Equal-cost multipath DAG of a source: path counts and traffic
+        shares over all shortest paths (see ecmp.ShortestPathDAG).
+        """
+        from ecmp import ShortestPathDAG
+        
+        return ShortestPathDAG(self, source_node)
+    
+    def _point_to_point_router(self):
+        """Return the heuristic preprocessing of the current topology."""
+        from point_to_point import PointToPointRouter
+        
+        router = getattr(self, '_router', None)
+        if router is None or router.compact is not self.freeze():
+            router = self._router = PointToPointRouter(self)
+        return router
+    
+    def reconstruct_path(self, predecessors, source, destination, stats=None):
         """
         Reconstruct the path from source to destination.
         
@@ -164,10 +704,19 @@ class Graph:
             predecessors: Dictionary of predecessors from algorithm
             source: Starting node
             destination: Target node
+            stats: Optional QueryStats of the query; reconstruct_seconds and
+                path_length are filled in (nothing is logged)
             
         Returns:
             list: Path from source to destination, or empty list if no path exists
         """
+        if stats is not None:
+            start = time.perf_counter()
+            path = self.reconstruct_path(predecessors, source, destination)
+            stats.reconstruct_seconds = time.perf_counter() - start
+            stats.path_length = len(path)
+            return path
+        
         if destination not in predecessors or predecessors[destination] is None:
             return []
         
@@ -199,15 +748,16 @@ class Graph:
         if not path or len(path) < 2:
             return []
         
+        compact = self.freeze()
+        index = compact.index
         path_with_weights = []
         for i in range(len(path) - 1):
             from_node = path[i]
             to_node = path[i + 1]
             
             # Find weight
-            for neighbor, weight in self.graph[from_node]:
-                if neighbor == to_node:
-                    path_with_weights.append((from_node, to_node, weight))
-                    break
+            weight = compact.edge_weight(index[from_node], index[to_node])
+            if weight is not None:
+                path_with_weights.append((from_node, to_node, weight))
         
         return path_with_weights
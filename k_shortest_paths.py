@@ -0,0 +1,178 @@
+"""
+K-shortest paths module.
+Yen's algorithm for loopless paths between two nodes, in increasing order of
+latency. The shortest-path tree towards the target gives exact remaining
+distances on the full graph: the first path is read from it, every spur
+search is an A* guided by it, and spur searches are only run when their
+lower bound reaches the front of the candidate queue.
+"""
+
+import heapq
+import itertools
+
+from graph_algorithms import shortest_path_tree
+
+INF = float('inf')
+
+# Candidate kinds in the queue
+_PATH = 0
+_SPUR = 1
+
+
+class KShortestPaths:
+    """Lazy Yen enumeration of simple paths towards one target."""
+
+    def __init__(self, graph, target):
+        """
+        Args:
+            graph: Graph to route on (non-negative weights)
+            target: Destination node name
+        """
+        self.compact = graph.freeze()
+        self.names = self.compact.names
+        if target not in self.compact.index:
+            raise ValueError(f"Node {target} not in graph")
+        self.target = self.compact.index[target]
+        # Distance to the target and next hop along the reverse tree
+        self.dist_to_target, self.next_hop, _ = shortest_path_tree(self.compact.reversed(), self.target)
+
+    def paths(self, source):
+        """
+        Yield simple paths source -> target by increasing latency.
+
+        Yields:
+            tuple: (total latency, [(from_node, to_node, weight), ...])
+        """
+        if source not in self.compact.index:
+            raise ValueError(f"Node {source} not in graph")
+        s = self.compact.index[source]
+        dist = self.dist_to_target
+        if dist[s] == INF:
+            return
+
+        counter = itertools.count()
+        accepted = []
+        seen = set()
+        common = {}
+        # Paths carry their deviation index: the spur node they left their parent at
+        heap = [(dist[s], next(counter), _PATH, self._tree_path(s) + (0,))]
+
+        while heap:
+            cost, _, kind, data = heapq.heappop(heap)
+
+            if kind == _PATH:
+                nodes, hop_weights, deviation = data
+                key = tuple(nodes)
+                if key in seen:
+                    continue
+                seen.add(key)
+                accepted.append((nodes, hop_weights))
+                yield cost, [(self.names[u], self.names[v], w)
+                             for u, v, w in zip(nodes, nodes[1:], hop_weights)]
+
+                # One deviation per spur node from the path's own deviation
+                # onwards (earlier ones were spurred from its parent), each
+                # searched only when its bound is reached
+                root_cost = sum(hop_weights[:deviation])
+                for i in range(deviation, len(nodes) - 1):
+                    heapq.heappush(heap, (root_cost + dist[nodes[i]], next(counter), _SPUR,
+                                          (len(accepted) - 1, i, root_cost)))
+                    root_cost += hop_weights[i]
+                continue
+
+            number, i, root_cost = data
+            nodes, hop_weights = accepted[number]
+            # Next hops already taken after this root by accepted paths
+            banned_next = set()
+            for other, (other_nodes, _) in enumerate(accepted):
+                pair = (min(number, other), max(number, other))
+                if pair not in common:
+                    common[pair] = _common_prefix(nodes, other_nodes)
+                if common[pair] > i and len(other_nodes) > i + 1:
+                    banned_next.add(other_nodes[i + 1])
+
+            spur = self._spur(nodes[i], set(nodes[:i]), banned_next)
+            if spur is not None:
+                spur_cost, spur_nodes, spur_weights = spur
+                heapq.heappush(heap, (root_cost + spur_cost, next(counter), _PATH,
+                                      (nodes[:i] + spur_nodes, hop_weights[:i] + spur_weights, i)))
+
+    def _cheapest_edge(self, u, v):
+        compact = self.compact
+        return min(compact.weights[k] for k in range(compact.offsets[u], compact.offsets[u + 1])
+                   if compact.targets[k] == v)
+
+    def _tree_path(self, s):
+        """Shortest path s -> target read from the reverse tree."""
+        nodes, hop_weights = [s], []
+        while nodes[-1] != self.target:
+            u = nodes[-1]
+            v = self.next_hop[u]
+            hop_weights.append(self._cheapest_edge(u, v))
+            nodes.append(v)
+        return nodes, hop_weights
+
+    def _spur(self, start, banned_nodes, banned_next):
+        """
+        A* from start to the target avoiding banned nodes, and the banned
+        next hops on the first edge. The distances to the target on the
+        full graph are an admissible, consistent heuristic for any subgraph.
+
+        Returns:
+            tuple: (cost, node ids, hop weights) or None if unreachable
+        """
+        offsets, targets, weights = self.compact.offsets, self.compact.targets, self.compact.weights
+        h, t = self.dist_to_target, self.target
+        g = {start: 0}
+        parent = {}
+        closed = set()
+        heap = [(h[start], start)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == t:
+                break
+            distance = g[u]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if v in closed or v in banned_nodes or h[v] == INF:
+                    continue
+                if u == start and v in banned_next:
+                    continue
+                new_distance = distance + weights[k]
+                if new_distance < g.get(v, INF):
+                    g[v] = new_distance
+                    parent[v] = (u, weights[k])
+                    heapq.heappush(heap, (new_distance + h[v], v))
+
+        if t not in closed:
+            return None
+        nodes, hop_weights = [t], []
+        while nodes[-1] != start:
+            u, w = parent[nodes[-1]]
+            nodes.append(u)
+            hop_weights.append(w)
+        nodes.reverse()
+        hop_weights.reverse()
+        return g[t], nodes, hop_weights
+
+
+def _common_prefix(a, b):
+    """Length of the common prefix of two node lists."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def k_shortest_paths(graph, source, target, k):
+    """
+    Return up to k loopless paths source -> target by increasing latency.
+
+    Returns:
+        list: (total latency, [(from_node, to_node, weight), ...]) tuples
+    """
+    return list(itertools.islice(KShortestPaths(graph, target).paths(source), k))
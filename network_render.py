@@ -0,0 +1,266 @@
+"""
+Network rendering module.
+Draws the static network (edges, nodes, labels, legend) once per topology
+into an Agg buffer, then composites each query's path highlight and failure
+marks on top of a copy of that background. Edges are drawn in batches as a
+single LineCollection of sampled quadratic Bezier curves (matplotlib's arc3
+connection style computed by hand).
+"""
+
+import math
+import threading
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+DEFAULT_RAD = 0.1
+
+# Straight segments per drawn curve
+BEZIER_SEGMENTS = 16
+
+# Edge weights of the background are only written when legible (points)
+MIN_LABEL_FONTSIZE = 6
+
+NODE_COLOR = '#2196F3'
+SOURCE_COLOR = '#4CAF50'
+TARGET_COLOR = '#F44336'
+INTERMEDIATE_COLOR = '#FFC107'
+DISABLED_COLOR = '#CCCCCC'
+FAILURE_COLOR = '#dc3545'
+
+EDGE_COLOR = '#999999'
+PATH_EDGE_COLOR = '#4CAF50'
+DISABLED_EDGE_COLOR = '#D3D3D3'
+LABEL_COLOR = '#d32f2f'
+
+LEGEND_ITEMS = [
+    (SOURCE_COLOR, 'Départ'),
+    (TARGET_COLOR, 'Arrivée'),
+    (INTERMEDIATE_COLOR, 'Intermédiaires'),
+    (NODE_COLOR, 'Autres'),
+    (DISABLED_COLOR, 'Hors service'),
+]
+
+
+class NetworkRenderer:
+    """Cached background of one topology plus per-query overlays."""
+
+    def __init__(self, graph, positions, edge_styles=None, figsize=(18, 10), dpi=100,
+                 title="Réseau de Villes - Plus Court Chemin"):
+        """
+        Args:
+            graph: Graph to draw
+            positions: Dict node -> (x, y)
+            edge_styles: Optional dict (a, b) -> 'arc3,rad=r' curvature overrides
+            figsize: Figure size in inches
+            dpi: Resolution of the rendered image
+            title: Figure title
+        """
+        self.nodes = [node for node in graph.get_nodes() if node in positions]
+        self.positions = positions
+
+        # Larger networks get smaller markers and fonts (unchanged up to 12 nodes)
+        self.scale = min(1.0, (12 / max(len(self.nodes), 1)) ** 0.5)
+
+        # One drawn link per node pair, keeping the first weight seen
+        styles = edge_styles or {}
+        self.links = {}
+        for src, dest, weight in graph.get_edges():
+            pair = frozenset((src, dest))
+            if len(pair) < 2 or pair in self.links or src not in positions or dest not in positions:
+                continue
+            if (dest, src) in styles and (src, dest) not in styles:
+                src, dest = dest, src
+            rad = _parse_rad(styles.get((src, dest), f'arc3,rad={DEFAULT_RAD}'))
+            self.links[pair] = (src, dest, weight, _arc3(positions[src], positions[dest], rad))
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self._lock = threading.Lock()
+        self._draw_background(title)
+
+    # ------------------------------------------------------------------
+    # Static layer
+    # ------------------------------------------------------------------
+
+    def _draw_background(self, title):
+        ax = self.ax
+
+        ax.add_collection(self._edge_collection(
+            [link[3] for link in self.links.values()], EDGE_COLOR, 2.5, 0.55), autolim=False)
+        self._node_collection(self.nodes, [NODE_COLOR] * len(self.nodes), [2200] * len(self.nodes))
+        for node in self.nodes:
+            self._node_label(node)
+        if 14 * self.scale >= MIN_LABEL_FONTSIZE:
+            for src, dest, weight, bezier in self.links.values():
+                self._edge_label(bezier, weight)
+
+        ax.set_title(title, fontsize=20, fontweight='bold', pad=25, color='#1f77b4')
+
+        # Legend at the bottom left, one item per row, in axes coordinates
+        step = 0.0316
+        for i, (color, text) in enumerate(LEGEND_ITEMS):
+            y = 0.0226 + i * step
+            ax.plot(0.024, y, 'o', color=color, markersize=11, markeredgewidth=0,
+                    transform=ax.transAxes, zorder=1000)
+            ax.text(0.04, y, text, fontsize=11, ha='left', va='center', color='#333333',
+                    transform=ax.transAxes, zorder=1000)
+        y = 0.0226 + len(LEGEND_ITEMS) * step
+        ax.text(0.016, y, 'X', fontsize=16, ha='left', va='center', color=FAILURE_COLOR, weight='bold',
+                transform=ax.transAxes, zorder=1000,
+                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8))
+        ax.text(0.04, y, 'En panne', fontsize=13, ha='left', va='center', color='#333333',
+                transform=ax.transAxes, zorder=1000)
+
+        ax.axis('off')
+        ax.set_xlim(*self._limits(0, 0.12, 0.1))
+        ax.set_ylim(*self._limits(1, 0.15, 0.1))
+        self.figure.tight_layout(pad=0)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    def _limits(self, axis, low_margin, high_margin):
+        values = [self.positions[node][axis] for node in self.nodes] or [0]
+        low, high = min(values), max(values)
+        span = (high - low) or 1
+        return low - low_margin * span, high + high_margin * span
+
+    # ------------------------------------------------------------------
+    # Per-query overlay
+    # ------------------------------------------------------------------
+
+    def render(self, path=None, disabled_links=(), disabled_cities=()):
+        """
+        Composite a query onto the cached background.
+
+        Args:
+            path: Node list of the highlighted route (None or empty for none)
+            disabled_links: Iterable of (a, b) links that are down
+            disabled_cities: Iterable of cities that are down
+
+        Returns:
+            numpy.ndarray: height x width x 4 RGBA image
+        """
+        path = list(path or [])
+        disabled_cities = set(disabled_cities)
+        down = {frozenset(link) for link in disabled_links}
+        path_pairs = {frozenset(hop) for hop in zip(path, path[1:])}
+
+        disabled_edges, path_edges = [], []
+        for pair, link in self.links.items():
+            if pair in down or pair & disabled_cities:
+                disabled_edges.append(link)
+            elif pair in path_pairs:
+                path_edges.append(link)
+
+        # Nodes whose look changes, plus endpoints of edges drawn over them
+        colors = {}
+        for src, dest, _, _ in disabled_edges + path_edges:
+            colors[src] = colors[dest] = (NODE_COLOR, 2200)
+        for node in path:
+            colors[node] = (INTERMEDIATE_COLOR, 2400)
+        if path:
+            colors[path[0]] = (SOURCE_COLOR, 2800)
+            colors[path[-1]] = (TARGET_COLOR, 2800)
+        for node in disabled_cities:
+            colors[node] = (DISABLED_COLOR, 2200)
+        redrawn = [node for node in colors if node in self.positions]
+
+        with self._lock:
+            artists = []
+            if disabled_edges:
+                beziers = [link[3] for link in disabled_edges]
+                # Erase the base stroke, then draw the dashed failure stroke
+                artists.append(self._edge_collection(beziers, 'white', 5, 1.0))
+                artists.append(self._edge_collection(beziers, DISABLED_EDGE_COLOR, 2, 0.4, 'dashed'))
+            if path_edges:
+                artists.append(self._edge_collection([link[3] for link in path_edges], PATH_EDGE_COLOR, 6, 0.85))
+            for collection in artists:
+                self.ax.add_collection(collection, autolim=False)
+            if redrawn:
+                artists.append(self._node_collection(
+                    redrawn, [colors[node][0] for node in redrawn], [colors[node][1] for node in redrawn]))
+
+            artists += [self._node_label(node) for node in redrawn]
+            artists += [self._edge_label(link[3], link[2], erase=True) for link in disabled_edges]
+            artists += [self._edge_label(link[3], 'X') for link in disabled_edges]
+            artists += [self._edge_label(link[3], link[2]) for link in path_edges]
+            for node in disabled_cities:
+                if node in self.positions:
+                    x, y = self.positions[node]
+                    artists.append(self.ax.text(x, y, 'X', fontsize=32 * self.scale, ha='center', va='center',
+                                                color='red', weight='bold', zorder=1000))
+
+            self.canvas.restore_region(self.background)
+            for artist in artists:
+                self.ax.draw_artist(artist)
+            image = np.asarray(self.canvas.buffer_rgba()).copy()
+            for artist in artists:
+                artist.remove()
+        return image
+
+    # ------------------------------------------------------------------
+    # Artists
+    # ------------------------------------------------------------------
+
+    def _edge_collection(self, beziers, color, width, alpha, linestyle='solid'):
+        # Quadratic Bezier curves sampled at once: (curves, segments + 1, 2)
+        t = np.linspace(0, 1, BEZIER_SEGMENTS + 1)[None, :, None]
+        points = np.asarray(beziers, dtype=float)
+        curves = ((1 - t) ** 2 * points[:, None, 0] + 2 * (1 - t) * t * points[:, None, 1]
+                  + t ** 2 * points[:, None, 2])
+        return LineCollection(curves, colors=color, linewidths=width * self.scale, linestyles=linestyle,
+                              alpha=alpha, transform=self.ax.transData, zorder=1)
+
+    def _node_collection(self, nodes, colors, sizes):
+        # scatter() adds the collection to the axes itself
+        offsets = [self.positions[node] for node in nodes]
+        return self.ax.scatter([x for x, _ in offsets], [y for _, y in offsets],
+                               s=[size * self.scale ** 2 for size in sizes], c=colors,
+                               alpha=0.95, linewidths=0, zorder=2)
+
+    def _node_label(self, node):
+        x, y = self.positions[node]
+        # Labels sit inside the fixed axes limits: the layout need not measure them
+        return self.ax.text(x, y, str(node), fontsize=17 * self.scale, fontweight='bold', color='white',
+                            ha='center', va='center', zorder=3, in_layout=False)
+
+    def _edge_label(self, bezier, text, erase=False):
+        # Point of the quadratic Bezier curve at t = 0.5
+        (x0, y0), (cx, cy), (x1, y1) = bezier
+        x, y = 0.25 * x0 + 0.5 * cx + 0.25 * x1, 0.25 * y0 + 0.5 * cy + 0.25 * y1
+        # Along the tangent there (parallel to the chord), kept upright
+        angle = math.degrees(math.atan2(y1 - y0, x1 - x0))
+        if angle > 90:
+            angle -= 180
+        elif angle <= -90:
+            angle += 180
+        if erase:
+            # Opaque white copy that hides a label of the background
+            color, bbox = 'white', dict(boxstyle='round,pad=0.4', facecolor='white', edgecolor='white', linewidth=2)
+        else:
+            color, bbox = LABEL_COLOR, dict(boxstyle='round,pad=0.4', facecolor='white', alpha=0.85)
+        return self.ax.text(x, y, str(text), fontsize=14 * self.scale, color=color, fontweight='bold',
+                            ha='center', va='center', rotation=angle, rotation_mode='anchor',
+                            transform_rotates_text=True, zorder=3, bbox=bbox, in_layout=False)
+
+
+def _parse_rad(style):
+    """Curvature of an 'arc3,rad=r' connection style."""
+    for part in style.split(',')[1:]:
+        key, _, value = part.partition('=')
+        if key.strip() == 'rad':
+            return float(value)
+    return 0.0
+
+
+def _arc3(start, end, rad):
+    """Control points of matplotlib's arc3 curve between two points."""
+    (x0, y0), (x1, y1) = start, end
+    dx, dy = x1 - x0, y1 - y0
+    control = ((x0 + x1) / 2 + rad * dy, (y0 + y1) / 2 - rad * dx)
+    return [(x0, y0), control, (x1, y1)]
@@ -0,0 +1,145 @@
+"""
+Shortest-path cache module.
+Bounded LRU cache of shortest-path trees keyed on the topology version, the
+source and the failure scenario, so repeated queries are served from memory.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from graph_algorithms import shortest_path_tree, shortest_path_tree_counted
+
+INF = float('inf')
+
+
+class PathCache:
+    """LRU cache of (distances, predecessors) per source and failure set."""
+
+    def __init__(self, graph, maxsize=256):
+        """
+        Args:
+            graph: Graph whose shortest-path trees are cached
+            maxsize: Maximum number of trees kept
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.graph = graph
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._version = graph.version
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def shortest_path_tree(self, source, failed_cities=(), failed_links=(), stats=None):
+        """
+        Return the shortest-path tree from source under a failure scenario.
+
+        Links are undirected: (a, b) and (b, a) are the same failure. The
+        returned dicts are shared with the cache and must not be modified.
+
+        Args:
+            source: Starting node name
+            failed_cities: Iterable of cities that are down
+            failed_links: Iterable of (node, node) links that are down
+            stats: Optional QueryStats; `cached` tells whether the tree came
+                from the cache, the algorithm counters are filled on a miss
+
+        Returns:
+            tuple: (distances dict, predecessors dict)
+        """
+        key = (self.graph.version, source, frozenset(failed_cities),
+               frozenset(frozenset(link) for link in failed_links if link[0] != link[1]))
+
+        with self._lock:
+            if key[0] != self._version:
+                # The topology changed: every cached tree is stale
+                self.invalidations += 1
+                self._entries.clear()
+                self._version = key[0]
+            result = self._entries.get(key)
+            if result is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                if stats is not None:
+                    stats.source = source
+                    stats.cached = True
+                return result
+            self.misses += 1
+
+        result = self._compute(source, key[2], key[3], stats)
+        if stats is not None:
+            stats.cached = False
+
+        with self._lock:
+            if key[0] == self._version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def _compute(self, source, failed_cities, failed_links, stats=None):
+        if not failed_cities and not failed_links:
+            return self.graph.dijkstra(source, stats=stats)
+
+        compact = self.graph.freeze()
+        index, offsets, targets = compact.index, compact.offsets, compact.targets
+        for node in (source, *failed_cities, *(node for link in failed_links for node in link)):
+            if node not in index:
+                raise ValueError(f"Node {node} not in graph")
+
+        start = time.perf_counter()
+        # One Dijkstra with the failed elements weighted out: a failed city
+        # cannot be left, and is marked unreachable afterwards
+        down = [index[city] for city in failed_cities]
+        weights = list(compact.weights)
+        for city in down:
+            for k in range(offsets[city], offsets[city + 1]):
+                weights[k] = INF
+        for a, b in failed_links:
+            for u, v in ((index[a], index[b]), (index[b], index[a])):
+                for k in range(offsets[u], offsets[u + 1]):
+                    if targets[k] == v:
+                        weights[k] = INF
+
+        n, source_idx = compact.num_nodes, index[source]
+        if source_idx in down:
+            L, P = [INF] * n, [None] * n
+        elif stats is None:
+            L, P, _ = shortest_path_tree(compact, source_idx, weights=weights)
+        else:
+            L, P, _ = shortest_path_tree_counted(compact, source_idx, stats, weights=weights)
+        for city in down:
+            L[city], P[city] = INF, None
+
+        names = compact.names
+        result = dict(zip(names, L)), {names[v]: (names[u] if u is not None else None) for v, u in enumerate(P)}
+        if stats is not None:
+            stats.algorithm = 'dijkstra'
+            stats.source = source
+            stats.target = None
+            stats.seconds = time.perf_counter() - start
+            stats.log()
+        return result
+
+    def stats(self):
+        """Return the cache counters."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        """Drop every cached tree (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
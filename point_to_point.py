@@ -0,0 +1,206 @@
+"""
+Point-to-point routing module.
+Goal-directed searches for a single source -> destination query: A* with a
+heuristic from node coordinates or from landmark distances (ALT), and
+bidirectional Dijkstra. Every search reports how many nodes it settled.
+"""
+
+import heapq
+import math
+
+from graph_algorithms import shortest_path_tree
+
+INF = float('inf')
+
+
+class PointToPointRouter:
+    """Preprocessed heuristics for point-to-point queries on one compact graph."""
+
+    def __init__(self, graph, landmarks=4):
+        """
+        Args:
+            graph: Graph to route on (non-negative weights)
+            landmarks: Number of ALT landmarks, used when coordinates are missing
+        """
+        self.compact = graph.freeze()
+        self.names = self.compact.names
+        self.index = self.compact.index
+        self.num_landmarks = landmarks
+
+        positions = graph.get_positions()
+        self.coordinates = None
+        if self.names and all(name in positions for name in self.names):
+            self.coordinates = [positions[name] for name in self.names]
+            self.scale = self._coordinate_scale()
+            if self.scale <= 0:
+                self.coordinates = None
+
+        self._landmark_from = None
+        self._landmark_to = None
+
+    # ------------------------------------------------------------------
+    # Heuristics
+    # ------------------------------------------------------------------
+
+    def _coordinate_scale(self):
+        """Largest factor keeping scale x straight-line distance below every edge weight."""
+        scale = INF
+        coordinates = self.coordinates
+        for u, v, weight in self.compact.edges():
+            length = math.dist(coordinates[u], coordinates[v])
+            if length > 0:
+                scale = min(scale, weight / length)
+        return scale if scale != INF else 0
+
+    def _select_landmarks(self):
+        """Farthest-point landmark selection, distances to and from each landmark."""
+        n = self.compact.num_nodes
+        reverse = self.compact.reversed()
+        self._landmark_from, self._landmark_to = [], []
+        closest = [INF] * n
+        landmark = 0
+        for _ in range(min(self.num_landmarks, n)):
+            dist_from, _, _ = shortest_path_tree(self.compact, landmark)
+            dist_to, _, _ = shortest_path_tree(reverse, landmark)
+            self._landmark_from.append(dist_from)
+            self._landmark_to.append(dist_to)
+            for v in range(n):
+                closest[v] = min(closest[v], min(dist_from[v], dist_to[v]))
+            landmark = max(range(n), key=lambda v: closest[v] if closest[v] < INF else -1)
+
+    def heuristic(self, target_idx, kind='auto'):
+        """
+        Build an admissible, consistent lower bound on the distance to a target.
+
+        Args:
+            target_idx: Target node id
+            kind: 'coordinates', 'landmarks' or 'auto' (coordinates when every
+                node has a position)
+
+        Returns:
+            callable: node id -> lower bound
+        """
+        if kind == 'auto':
+            kind = 'coordinates' if self.coordinates is not None else 'landmarks'
+
+        if kind == 'coordinates':
+            if self.coordinates is None:
+                raise ValueError("Coordinates are missing or unusable for this graph")
+            tx, ty = self.coordinates[target_idx]
+            coordinates, scale = self.coordinates, self.scale
+            return lambda v: scale * math.hypot(coordinates[v][0] - tx, coordinates[v][1] - ty)
+
+        if kind == 'landmarks':
+            if self._landmark_from is None:
+                self._select_landmarks()
+            bounds = []
+            for dist_from, dist_to in zip(self._landmark_from, self._landmark_to):
+                bounds.append((dist_from, dist_from[target_idx], dist_to, dist_to[target_idx]))
+
+            def lower_bound(v):
+                best = 0
+                for dist_from, from_target, dist_to, to_target in bounds:
+                    # d(L, t) <= d(L, v) + d(v, t)  and  d(v, L) <= d(v, t) + d(t, L)
+                    if from_target < INF and dist_from[v] < INF:
+                        best = max(best, from_target - dist_from[v])
+                    if dist_to[v] < INF and to_target < INF:
+                        best = max(best, dist_to[v] - to_target)
+                return best
+            return lower_bound
+
+        raise ValueError(f"Unknown heuristic {kind}")
+
+    # ------------------------------------------------------------------
+    # Searches
+    # ------------------------------------------------------------------
+
+    def astar(self, source, target, heuristic='auto'):
+        """
+        A* search from source to target.
+
+        Returns:
+            tuple: (distance, path, number of settled nodes)
+        """
+        s, t = self.index[source], self.index[target]
+        h = self.heuristic(t, heuristic)
+        offsets, targets, weights = self.compact.offsets, self.compact.targets, self.compact.weights
+
+        g = {s: 0}
+        parent = {s: s}
+        closed = set()
+        heap = [(h(s), s)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == t:
+                break
+            distance = g[u]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if v in closed:
+                    continue
+                new_distance = distance + weights[k]
+                if new_distance < g.get(v, INF):
+                    g[v] = new_distance
+                    parent[v] = u
+                    heapq.heappush(heap, (new_distance + h(v), v))
+
+        if t not in closed:
+            return INF, [], len(closed)
+        return g[t], self._unwind(parent, s, t), len(closed)
+
+    def bidirectional_dijkstra(self, source, target):
+        """
+        Dijkstra from both ends; stops once the two frontiers cannot improve
+        the best meeting point.
+
+        Returns:
+            tuple: (distance, path, number of settled nodes)
+        """
+        s, t = self.index[source], self.index[target]
+        if s == t:
+            return 0, [source], 1
+
+        graphs = (self.compact, self.compact.reversed())
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: s}, {t: t})
+        settled = (set(), set())
+        heaps = ([(0, s)], [(0, t)])
+        best, meeting = INF, None
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+
+            graph = graphs[side]
+            own, other = dist[side], dist[1 - side]
+            for k in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.targets[k]
+                new_distance = d + graph.weights[k]
+                if new_distance < own.get(v, INF):
+                    own[v] = new_distance
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (new_distance, v))
+                if v in other and new_distance + other[v] < best:
+                    best, meeting = new_distance + other[v], v
+
+        count = len(settled[0]) + len(settled[1])
+        if meeting is None:
+            return INF, [], count
+
+        forward = self._unwind(parent[0], s, meeting)
+        backward = self._unwind(parent[1], t, meeting)
+        return best, forward + backward[-2::-1], count
+
+    def _unwind(self, parent, start, end):
+        path = [end]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        return [self.names[v] for v in reversed(path)]
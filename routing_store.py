@@ -0,0 +1,152 @@
+"""
+Routing-table store module.
+Persists the distance and next-hop matrices of a RoutingTable together with
+a hash of the topology they were computed from. A new process maps the file
+read-only and answers lookups at once when the hash still matches; tables
+are only recomputed after the topology changes.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from routing_table import RoutingTable
+
+STORE_MAGIC = b'RORTB\x00\x01\x00'
+# magic, node count, distance itemsize (4 or 8), integral latencies, topology hash
+STORE_HEADER = struct.Struct('<8sqcc6x32s')
+STORE_SUFFIX = '.rtab'
+
+
+def topology_hash(graph):
+    """
+    SHA-256 of the node order and CSR buffers of a graph.
+
+    Node ids index the stored matrices, so the order of the names is part of
+    the key, and so is the weight type (integer or float latencies).
+
+    Returns:
+        bytes: 32-byte digest
+    """
+    compact = graph.freeze()
+    offsets, targets, weights = compact.as_numpy()
+    digest = hashlib.sha256()
+    digest.update(json.dumps(compact.names, ensure_ascii=False).encode('utf-8'))
+    digest.update(offsets.astype('<i8').tobytes())
+    digest.update(targets.astype('<i4').tobytes())
+    if weights.dtype.kind in 'iu':
+        digest.update(b'q' + weights.astype('<i8').tobytes())
+    else:
+        digest.update(b'd' + weights.astype('<f8').tobytes())
+    return digest.digest()
+
+
+def save_table(table, path, key):
+    """
+    Write a routing table atomically (temporary file, then rename).
+
+    Layout (little endian): header, distances (n x n float32 or float64),
+    padding to 8 bytes, next hops (n x n int32).
+
+    Args:
+        table: RoutingTable to persist
+        path: Output file
+        key: Topology hash of the graph the table was built from
+    """
+    n = len(table.names)
+    distances = np.ascontiguousarray(table.distances)
+    if distances.dtype not in (np.float32, np.float64):
+        distances = distances.astype(np.float64)
+    distances = distances.astype(distances.dtype.newbyteorder('<'), copy=False)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(STORE_HEADER.pack(STORE_MAGIC, n, bytes([distances.dtype.itemsize]),
+                                      b'\x01' if table.integral else b'\x00', key))
+            f.write(distances.tobytes())
+            f.write(b'\x00' * (-distances.nbytes % 8))
+            f.write(np.ascontiguousarray(table.next_hops, dtype='<i4').tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_table(path, names, key=None):
+    """
+    Memory-map a stored routing table.
+
+    Args:
+        path: Store file written by save_table
+        names: Node names of the graph, position = node id
+        key: Expected topology hash (None skips the check)
+
+    Returns:
+        RoutingTable: Table whose matrices are read-only views of the
+            mapping, or None if the file is missing, malformed or stale
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < STORE_HEADER.size:
+        return None
+    magic, n, itemsize, integral, stored_key = STORE_HEADER.unpack_from(mapping)
+    itemsize = itemsize[0]
+    if magic != STORE_MAGIC or n != len(names) or itemsize not in (4, 8) or (key is not None and stored_key != key):
+        return None
+
+    distance_bytes = n * n * itemsize
+    position = STORE_HEADER.size
+    hops_position = position + distance_bytes + (-distance_bytes % 8)
+    if len(mapping) != hops_position + 4 * n * n:
+        return None
+
+    distances = np.frombuffer(mapping, dtype='<f4' if itemsize == 4 else '<f8', count=n * n,
+                              offset=position).reshape(n, n)
+    next_hops = np.frombuffer(mapping, dtype='<i4', count=n * n, offset=hops_position).reshape(n, n)
+    return RoutingTable(list(names), distances, next_hops, integral == b'\x01')
+
+
+def store_path(directory, key):
+    """Store file of a topology hash inside a store directory."""
+    return os.path.join(directory, key.hex()[:32] + STORE_SUFFIX)
+
+
+def load_or_build(graph, directory, method='auto', processes=None):
+    """
+    Return the routing table of a graph, from the store when it is current.
+
+    Tables are filed by topology hash, so switching between topologies keeps
+    every table; a changed topology gets a new file.
+
+    Args:
+        graph: Graph to route on
+        directory: Store directory (created if needed)
+        method: RoutingTable.build method used on a miss
+        processes: Worker count of the 'parallel' method
+
+    Returns:
+        tuple: (RoutingTable, True if it was loaded from the store)
+    """
+    key = topology_hash(graph)
+    names = graph.freeze().names
+    path = store_path(directory, key)
+
+    table = load_table(path, names, key)
+    if table is not None:
+        return table, True
+
+    table = RoutingTable.build(graph, method, processes)
+    os.makedirs(directory, exist_ok=True)
+    save_table(table, path, key)
+    return table, False
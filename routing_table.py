@@ -0,0 +1,181 @@
+"""
+All-pairs routing table module.
+Precomputes distance and next-hop matrices of a Graph so that any
+(source, destination) latency or path is answered by table lookup.
+"""
+
+import numpy as np
+
+from all_sources import all_sources, first_hops
+from bellman_ford_numpy import johnson_potentials, reweight
+from graph_algorithms import shortest_path_tree
+
+NO_HOP = -1
+
+
+class RoutingTable:
+    """Distance and next-hop matrices indexed by node id."""
+
+    def __init__(self, names, distances, next_hops, integral=False):
+        """
+        Args:
+            names: List of node names, position = node id
+            distances: n x n float matrix, inf when unreachable
+            next_hops: n x n int32 matrix of first-hop ids, NO_HOP when unreachable
+            integral: Whether latencies should be reported as integers
+        """
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.distances = distances
+        self.next_hops = next_hops
+        self.integral = integral
+
+    @classmethod
+    def build(cls, graph, method='auto', processes=None):
+        """
+        Compute the table for a Graph.
+
+        Args:
+            graph: Graph to route on
+            method: 'floyd' (vectorized Floyd-Warshall, for small or dense
+                graphs), 'dijkstra' (one heap Dijkstra per source, for sparse
+                graphs), 'johnson' (Dijkstra after Bellman-Ford reweighting,
+                for sparse graphs with negative weights), 'parallel' (the
+                Dijkstra runs spread over a process pool, writing into
+                shared float32 matrices) or 'auto'
+            processes: Worker count of the 'parallel' method
+
+        Returns:
+            RoutingTable: Precomputed table
+        """
+        compact = graph.freeze()
+        n, m = compact.num_nodes, compact.num_edges
+        _, _, weights = compact.as_numpy()
+        negative = bool(m) and weights.min() < 0
+
+        if method == 'auto':
+            if n <= 1024 or m >= n * n // 8:
+                method = 'floyd'
+            else:
+                method = 'johnson' if negative else 'dijkstra'
+        if method == 'floyd':
+            distances, next_hops = floyd_warshall(compact)
+            if n and np.diagonal(distances).min() < 0:
+                # Let Bellman-Ford report the offending cycle
+                node = compact.names[int(np.argmin(np.diagonal(distances)))]
+                graph.bellman_ford(node)
+        elif method == 'dijkstra':
+            if negative:
+                raise ValueError("Dijkstra routing tables require non-negative weights")
+            distances, next_hops = repeated_dijkstra(compact)
+        elif method == 'parallel':
+            if negative:
+                raise ValueError("Dijkstra routing tables require non-negative weights")
+            shared = all_sources(graph, processes, predecessors=False, next_hops=True)
+            table = cls(list(compact.names), shared.distances, shared.next_hops, weights.dtype.kind in 'iu')
+            # The matrices live as long as the table holds their blocks
+            shared.unlink()
+            table.shared = shared
+            return table
+        elif method == 'johnson':
+            distances, next_hops = johnson(compact)
+        else:
+            raise ValueError(f"Unknown method {method}")
+
+        return cls(list(compact.names), distances, next_hops, weights.dtype.kind in 'iu')
+
+    def latency(self, source, destination):
+        """Return the shortest latency source -> destination (inf if unreachable)."""
+        value = self.distances[self.index[source], self.index[destination]]
+        if self.integral and np.isfinite(value):
+            return int(value)
+        return float(value)
+
+    def next_hop(self, source, destination):
+        """Return the first hop from source towards destination, or None."""
+        hop = self.next_hops[self.index[source], self.index[destination]]
+        return self.names[hop] if hop != NO_HOP else None
+
+    def path(self, source, destination):
+        """
+        Follow next hops from source to destination.
+
+        Returns:
+            list: Path from source to destination, or empty list if no path exists
+        """
+        u, v = self.index[source], self.index[destination]
+        if u == v:
+            return [source]
+        if self.next_hops[u, v] == NO_HOP:
+            return []
+
+        path = [u]
+        while u != v:
+            u = int(self.next_hops[u, v])
+            path.append(u)
+        return [self.names[i] for i in path]
+
+
+def floyd_warshall(compact):
+    """
+    Vectorized Floyd-Warshall: one NumPy broadcast per intermediate node.
+
+    Returns:
+        tuple: (distance matrix, next-hop matrix)
+    """
+    n = compact.num_nodes
+    offsets, targets, weights = compact.as_numpy()
+    sources = np.repeat(np.arange(n), np.diff(offsets))
+
+    distances = np.full((n, n), np.inf)
+    np.minimum.at(distances, (sources, targets), weights)
+    np.fill_diagonal(distances, np.minimum(np.diagonal(distances), 0))
+
+    next_hops = np.where(np.isfinite(distances), np.arange(n, dtype=np.int32), NO_HOP).astype(np.int32)
+    np.fill_diagonal(next_hops, np.arange(n, dtype=np.int32))
+
+    for k in range(n):
+        via = distances[:, k, None] + distances[None, k, :]
+        shorter = via < distances
+        distances = np.where(shorter, via, distances)
+        next_hops = np.where(shorter, next_hops[:, k, None], next_hops)
+
+    return distances, next_hops
+
+
+def repeated_dijkstra(compact):
+    """
+    One heap Dijkstra per source; next hops follow the settle order.
+
+    Returns:
+        tuple: (distance matrix, next-hop matrix)
+    """
+    n = compact.num_nodes
+    distances = np.full((n, n), np.inf)
+    next_hops = np.full((n, n), NO_HOP, dtype=np.int32)
+
+    for source in range(n):
+        L, P, order = shortest_path_tree(compact, source)
+        distances[source] = L
+        next_hops[source] = first_hops(P, order, source)
+
+    return distances, next_hops
+
+
+def johnson(compact):
+    """
+    Johnson's algorithm: Bellman-Ford potentials make every weight
+    non-negative, then one heap Dijkstra per source on the reweighted graph.
+
+    Returns:
+        tuple: (distance matrix, next-hop matrix)
+
+    Raises:
+        NegativeCycleError: If the graph has a negative cycle
+    """
+    potentials = johnson_potentials(compact)
+    distances, next_hops = repeated_dijkstra(reweight(compact, potentials))
+    # A path u -> v was lengthened by h(u) - h(v)
+    distances -= potentials[:, None]
+    distances += potentials[None, :]
+    return distances, next_hops
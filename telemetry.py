@@ -0,0 +1,365 @@
+"""
+Telemetry ingestion module.
+Consumes link latency measurements as JSON Lines ({"source", "target",
+"latency"}) from a file, a pipe or a local unix socket. Each link is smoothed
+with an EWMA; changes beyond a dead band are batched and debounced, applied
+to the Graph weights in place, and the watched shortest-path trees are
+repaired incrementally. Every route that changes produces an event.
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import stat
+import sys
+import time
+
+from dynamic_sp import DynamicShortestPaths
+from graph_algorithms import Graph
+
+
+# ----------------------------------------------------------------------
+# Measurement sources
+# ----------------------------------------------------------------------
+
+def parse_measurement(line):
+    """Return (source, target, latency) from one JSON line, or None if malformed."""
+    try:
+        record = json.loads(line)
+        return record['source'], record['target'], float(record['latency'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def read_measurements(spec, idle_timeout=0.05):
+    """
+    Yield measurements from a source.
+
+    Args:
+        spec: Path of a file or named pipe, '-' for stdin, or 'unix:PATH' to
+            listen on a unix socket (any number of clients, until interrupted)
+        idle_timeout: Seconds without data after which None is yielded, so
+            the consumer can flush debounced updates (pipes and sockets only)
+
+    Yields:
+        tuple: (source, target, latency), or None when idle
+    """
+    if spec.startswith('unix:'):
+        yield from _read_socket(spec[len('unix:'):], idle_timeout)
+    elif spec == '-':
+        yield from _read_stream(sys.stdin.buffer, idle_timeout)
+    else:
+        with open(spec, 'rb') as f:
+            yield from _read_stream(f, idle_timeout)
+
+
+def _read_stream(f, idle_timeout):
+    if stat.S_ISREG(os.fstat(f.fileno()).st_mode):
+        # Regular files are never idle: read straight through
+        for line in f:
+            measurement = parse_measurement(line)
+            if measurement is not None:
+                yield measurement
+    else:
+        yield from _read_fd(f.fileno(), idle_timeout)
+
+
+def _split_lines(buffer, data):
+    """Append data to a partial line buffer; return (complete lines, rest)."""
+    buffer += data
+    *lines, rest = buffer.split(b'\n')
+    return lines, rest
+
+
+def _read_fd(fd, idle_timeout):
+    selector = selectors.DefaultSelector()
+    selector.register(fd, selectors.EVENT_READ)
+    buffer = b''
+    try:
+        while True:
+            if not selector.select(idle_timeout):
+                yield None
+                continue
+            data = os.read(fd, 1 << 16)
+            if not data:
+                break
+            lines, buffer = _split_lines(buffer, data)
+            for line in lines:
+                measurement = parse_measurement(line)
+                if measurement is not None:
+                    yield measurement
+        if buffer.strip():
+            measurement = parse_measurement(buffer)
+            if measurement is not None:
+                yield measurement
+    finally:
+        selector.close()
+
+
+def _read_socket(path, idle_timeout):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    buffers = {}
+    try:
+        while True:
+            events = selector.select(idle_timeout)
+            if not events:
+                yield None
+                continue
+            for key, _ in events:
+                if key.fileobj is server:
+                    connection, _ = server.accept()
+                    connection.setblocking(False)
+                    selector.register(connection, selectors.EVENT_READ)
+                    buffers[connection] = b''
+                    continue
+                connection = key.fileobj
+                data = connection.recv(1 << 16)
+                if not data:
+                    selector.unregister(connection)
+                    connection.close()
+                    lines = [buffers.pop(connection)]
+                else:
+                    lines, buffers[connection] = _split_lines(buffers[connection], data)
+                for line in lines:
+                    measurement = parse_measurement(line)
+                    if measurement is not None:
+                        yield measurement
+    finally:
+        for connection in buffers:
+            connection.close()
+        selector.close()
+        server.close()
+        os.unlink(path)
+
+
+# ----------------------------------------------------------------------
+# Ingestion
+# ----------------------------------------------------------------------
+
+class TelemetryIngestor:
+    """Smoothed, debounced weight updates with incremental rerouting."""
+
+    def __init__(self, graph, watch=(), alpha=0.2, min_change=1.0, debounce=0.1, max_batch=10000,
+                 bidirectional=True, paths=True):
+        """
+        Args:
+            graph: Graph whose weights are updated in place
+            watch: Source nodes whose shortest-path trees are kept up to date
+            alpha: EWMA weight of a new sample
+            min_change: Dead band (ms): smaller moves of a link are not applied
+            debounce: Seconds a pending change may wait for others to batch with
+            max_batch: Pending link count that forces an immediate flush
+            bidirectional: Apply a measurement of a -> b to b -> a as well
+            paths: Put the full old and new paths in the events (costs a walk
+                up the tree per event on large topologies)
+        """
+        self.graph = graph
+        self.alpha = alpha
+        self.min_change = min_change
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.bidirectional = bidirectional
+        self.paths = paths
+
+        # Weight currently in the graph per directed link (first edge wins)
+        self.applied = {}
+        for a, b, weight in graph.get_edges():
+            self.applied.setdefault((a, b), weight)
+        self.smoothed = {}
+        self.pending = {}
+        self._pending_since = None
+
+        self.trees = {source: DynamicShortestPaths(graph, source) for source in watch}
+
+        self.measurements = 0
+        self.ignored = 0
+        self.batches = 0
+        self.updates = 0
+
+    def ingest(self, source, target, latency, now=None):
+        """
+        Record one measurement.
+
+        Returns:
+            list: Route-change events, if this measurement triggered a flush
+        """
+        now = time.monotonic() if now is None else now
+        link = (source, target)
+        if link not in self.applied:
+            self.ignored += 1
+            return []
+        self.measurements += 1
+
+        previous = self.smoothed.get(link)
+        value = latency if previous is None else previous + self.alpha * (latency - previous)
+        self.smoothed[link] = value
+
+        links = (link, (target, source)) if self.bidirectional and (target, source) in self.applied else (link,)
+        for key in links:
+            if abs(value - self.applied[key]) >= self.min_change:
+                self.pending[key] = value
+            else:
+                self.pending.pop(key, None)
+
+        if not self.pending:
+            self._pending_since = None
+            return []
+        if self._pending_since is None:
+            self._pending_since = now
+        if len(self.pending) >= self.max_batch or now - self._pending_since >= self.debounce:
+            return self.flush()
+        return []
+
+    def tick(self, now=None):
+        """Flush pending changes whose debounce delay has elapsed."""
+        now = time.monotonic() if now is None else now
+        if self.pending and now - self._pending_since >= self.debounce:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Apply every pending change to the graph and the watched trees.
+
+        Returns:
+            list: Route-change events {'source', 'destination', 'old_via',
+                'new_via', 'old_latency', 'new_latency'[, 'old_path',
+                'new_path']}, 'via' being the hop before the destination
+        """
+        if not self.pending:
+            return []
+        updates = [(a, b, weight) for (a, b), weight in self.pending.items()]
+        self.pending = {}
+        self._pending_since = None
+
+        self.graph.update_weights(updates)
+        for a, b, weight in updates:
+            self.applied[(a, b)] = weight
+        self.batches += 1
+        self.updates += len(updates)
+
+        events = []
+        for source, tree in self.trees.items():
+            old_parent, old_dist = list(tree.parent), list(tree.dist)
+            changed = tree.update_weights(updates)
+            events.extend(self._route_changes(source, tree, changed, old_parent, old_dist))
+        return events
+
+    def _route_changes(self, source, tree, changed, old_parent, old_dist):
+        """Events for the changed destinations whose path is different."""
+        index, names = tree.compact.index, tree.names
+        parent = tree.parent
+        path_changed = {tree.source: False}
+
+        def differs(v):
+            # A path changes when the node or one of its tree ancestors got a new parent
+            chain = []
+            while v not in path_changed:
+                chain.append(v)
+                if parent[v] != old_parent[v] or parent[v] is None:
+                    break
+                v = parent[v]
+            result = path_changed[v] if v in path_changed else True
+            for u in reversed(chain):
+                if parent[u] != old_parent[u] or parent[u] is None:
+                    result = True
+                path_changed[u] = result
+            return result
+
+        events = []
+        for name in changed:
+            v = index[name]
+            if not differs(v):
+                continue
+            event = {
+                'source': source,
+                'destination': name,
+                'old_via': names[old_parent[v]] if old_parent[v] is not None else None,
+                'new_via': names[parent[v]] if parent[v] is not None else None,
+                'old_latency': _finite(old_dist[v]),
+                'new_latency': _finite(tree.dist[v]),
+            }
+            if self.paths:
+                event['old_path'] = _walk(old_parent, tree.source, v, names)
+                event['new_path'] = _walk(parent, tree.source, v, names)
+            events.append(event)
+        return events
+
+    def run(self, measurements):
+        """
+        Consume a measurement stream (see read_measurements).
+
+        Yields:
+            dict: Route-change events as they are produced
+        """
+        for item in measurements:
+            if item is None:
+                yield from self.tick()
+            else:
+                yield from self.ingest(*item)
+        yield from self.flush()
+
+    def stats(self):
+        """Return the ingestion counters."""
+        return {
+            'measurements': self.measurements,
+            'ignored': self.ignored,
+            'batches': self.batches,
+            'updates': self.updates,
+            'pending': len(self.pending),
+        }
+
+
+def _walk(parent, source, v, names):
+    if parent[v] is None:
+        return []
+    path = [v]
+    while v != source:
+        v = parent[v]
+        path.append(v)
+    return [names[u] for u in reversed(path)]
+
+
+def _finite(value):
+    return value if value != float('inf') else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency telemetry ingestion (route-change events as JSON Lines)")
+    parser.add_argument('input', help="File or named pipe, '-' for stdin, or unix:PATH to listen on a socket")
+    parser.add_argument('--topology', help="CSV, JSON Lines or snapshot topology (default: built-in network)")
+    parser.add_argument('--watch', nargs='+', default=[], help="Source nodes whose routes are tracked")
+    parser.add_argument('--alpha', type=float, default=0.2)
+    parser.add_argument('--min-change', type=float, default=1.0)
+    parser.add_argument('--debounce', type=float, default=0.1)
+    parser.add_argument('--no-paths', action='store_true', help="Only report the hop before each destination")
+    args = parser.parse_args(argv)
+
+    if args.topology:
+        from topology_io import load_topology
+        graph = load_topology(args.topology)
+    else:
+        graph = Graph()
+
+    ingestor = TelemetryIngestor(graph, args.watch, args.alpha, args.min_change, args.debounce,
+                                 paths=not args.no_paths)
+    try:
+        for event in ingestor.run(read_measurements(args.input)):
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    sys.stderr.write(json.dumps(ingestor.stats()) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Topology generators module.
+Synthetic WAN-like topologies for benchmarks: random geometric, grid,
+hub-and-spoke and scale-free (Barabasi-Albert) graphs. Edges are built as
+NumPy arrays and frozen straight into CSR form, so 10^6 nodes stay cheap.
+Links are bidirectional with integer latencies (ms); negative weights can be
+added without creating negative cycles.
+"""
+
+import numpy as np
+
+from compact_graph import CompactGraph
+from graph_algorithms import Graph
+
+MAX_LATENCY = 50
+
+
+def random_geometric(n, degree=6, seed=None, negative_weights=False):
+    """
+    Random geometric graph: n points in the unit square, linked when closer
+    than the radius giving the requested mean degree. Latency grows with the
+    distance (1 to MAX_LATENCY ms).
+
+    Args:
+        n: Number of nodes
+        degree: Expected mean degree
+        seed: Random seed
+        negative_weights: Reweight with node potentials (see _add_potentials)
+
+    Returns:
+        Graph: Topology with node positions
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2))
+    radius = min(1.0, np.sqrt(degree / (np.pi * max(n - 1, 1))))
+
+    # Bucket points in cells of side radius; only neighbouring cells can link
+    cells = max(1, int(1 / radius))
+    cx = np.minimum((points[:, 0] * cells).astype(np.int64), cells - 1)
+    cy = np.minimum((points[:, 1] * cells).astype(np.int64), cells - 1)
+    cell = cx * cells + cy
+    order = np.argsort(cell, kind='stable')
+    sorted_cell = cell[order]
+    starts = np.searchsorted(sorted_cell, np.arange(cells * cells))
+    ends = np.searchsorted(sorted_cell, np.arange(cells * cells), side='right')
+
+    sources, targets = [], []
+    # Own cell plus half of the neighbours, so every cell pair is seen once
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        ox, oy = cx + dx, cy + dy
+        valid = (ox < cells) & (oy >= 0) & (oy < cells)
+        a = np.nonzero(valid)[0]
+        other = ox[a] * cells + oy[a]
+        counts = ends[other] - starts[other]
+        a_rep = np.repeat(a, counts)
+        # Position of each candidate inside its cell run
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        b = order[np.repeat(starts[other], counts) + within]
+        keep = a_rep < b if (dx, dy) == (0, 0) else np.ones(len(b), dtype=bool)
+        a_rep, b = a_rep[keep], b[keep]
+        close = np.hypot(*(points[a_rep] - points[b]).T) < radius
+        sources.append(a_rep[close])
+        targets.append(b[close])
+
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    distance = np.hypot(*(points[sources] - points[targets]).T)
+    weights = 1 + (distance / radius * (MAX_LATENCY - 1)).astype(np.int64)
+    positions = {f'N{i}': (float(x), float(y)) for i, (x, y) in enumerate(points)}
+    return _build(n, sources, targets, weights, rng, negative_weights, positions)
+
+
+def grid(rows, cols=None, seed=None, negative_weights=False):
+    """
+    rows x cols mesh with 4-neighbour links and random latencies.
+
+    Returns:
+        Graph: Topology with node positions
+    """
+    cols = rows if cols is None else cols
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows * cols).reshape(rows, cols)
+    sources = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    targets = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    weights = rng.integers(1, MAX_LATENCY + 1, len(sources))
+    positions = {f'N{i}': (float(i % cols), float(-(i // cols))) for i in range(rows * cols)}
+    return _build(rows * cols, sources, targets, weights, rng, negative_weights, positions)
+
+
+def hub_and_spoke(n, hubs=None, seed=None, negative_weights=False):
+    """
+    SD-WAN style topology: a full mesh of hubs, every other site dual-homed
+    to two distinct hubs (single-homed when there is only one hub).
+
+    Args:
+        n: Total number of nodes
+        hubs: Number of hubs (default: about sqrt(n) / 4, at least 2)
+
+    Returns:
+        Graph: Topology without positions
+    """
+    rng = np.random.default_rng(seed)
+    if hubs is None:
+        hubs = max(2, int(np.sqrt(n) / 4))
+    hubs = max(1, min(hubs, n))
+
+    hub_a, hub_b = np.triu_indices(hubs, k=1)
+    sources, targets = [hub_a], [hub_b]
+    weights = [rng.integers(5, 31, len(hub_a))]
+
+    spokes = np.arange(hubs, n)
+    first = rng.integers(0, hubs, len(spokes))
+    sources.append(spokes)
+    targets.append(first)
+    weights.append(rng.integers(1, 21, len(spokes)))
+    if hubs > 1:
+        second = (first + rng.integers(1, hubs, len(spokes))) % hubs
+        sources.append(spokes)
+        targets.append(second)
+        weights.append(rng.integers(1, 21, len(spokes)))
+
+    return _build(n, np.concatenate(sources), np.concatenate(targets), np.concatenate(weights),
+                  rng, negative_weights)
+
+
+def scale_free(n, m=2, seed=None, negative_weights=False):
+    """
+    Barabasi-Albert preferential attachment: each new node links to m
+    existing nodes chosen proportionally to their degree.
+
+    Returns:
+        Graph: Topology without positions
+    """
+    rng = np.random.default_rng(seed)
+    m = max(1, min(m, n - 1)) if n > 1 else 0
+
+    # Start from a star on the first m + 1 nodes
+    sources = list(range(1, m + 1))
+    targets = [0] * m
+    endpoints = sources + targets
+    draws = rng.random((max(n - m - 1, 0), m))
+    for row, new in enumerate(range(m + 1, n)):
+        total = len(endpoints)
+        chosen = {endpoints[int(u * total)] for u in draws[row]}
+        for old in chosen:
+            sources.append(new)
+            targets.append(old)
+            endpoints.append(new)
+            endpoints.append(old)
+
+    weights = rng.integers(1, MAX_LATENCY + 1, len(sources))
+    return _build(n, np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+                  weights, rng, negative_weights)
+
+
+GENERATORS = {
+    'geometric': random_geometric,
+    'grid': lambda n, seed=None, negative_weights=False: grid(
+        max(1, int(round(np.sqrt(n)))), seed=seed, negative_weights=negative_weights),
+    'hub_and_spoke': hub_and_spoke,
+    'scale_free': scale_free,
+}
+
+
+def generate(kind, n, seed=None, negative_weights=False):
+    """Build a topology of about n nodes by generator name (see GENERATORS)."""
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown topology {kind}")
+    return GENERATORS[kind](n, seed=seed, negative_weights=negative_weights)
+
+
+def _add_potentials(sources, targets, weights, n, rng):
+    """
+    Reweight w'(u, v) = w(u, v) + p(u) - p(v) with random potentials p.
+
+    Every cycle keeps its (positive) length, so no negative cycle appears,
+    while many single edges become negative.
+    """
+    potential = rng.integers(0, 2 * MAX_LATENCY, n)
+    return weights + potential[sources] - potential[targets]
+
+
+def _build(n, sources, targets, weights, rng, negative_weights, positions=None):
+    """Freeze undirected links (both directions) into a Graph."""
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.int64)
+    all_sources = np.concatenate([sources, targets])
+    all_targets = np.concatenate([targets, sources])
+    all_weights = np.concatenate([weights, weights])
+    if negative_weights:
+        all_weights = _add_potentials(all_sources, all_targets, all_weights, n, rng)
+
+    names = [f'N{i}' for i in range(n)]
+    compact = CompactGraph.from_edge_arrays(names, all_sources, all_targets, all_weights)
+    return Graph.from_compact(compact, positions=positions)
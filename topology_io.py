@@ -0,0 +1,244 @@
+"""
+Topology loading module.
+Streams edge-list CSV and JSON Lines topologies straight into the compact
+(CSR) form, and saves/loads a binary snapshot that is memory-mapped on load.
+Integral weights are kept exact as int64 unless one weight of the topology
+is fractional, in which case all of them are stored as float64.
+"""
+
+import csv
+import json
+import mmap
+import struct
+from array import array
+
+from compact_graph import CompactGraph
+from graph_algorithms import Graph
+
+SNAPSHOT_MAGIC = b'RONET\x00\x01\x00'
+# magic, node count, edge count, weight typecode, has coordinates, metadata length
+SNAPSHOT_HEADER = struct.Struct('<8sqqcc6xq')
+
+
+class _TopologyBuilder:
+    """Accumulates streamed nodes/edges in flat arrays before the CSR sort."""
+
+    def __init__(self, bidirectional):
+        self.bidirectional = bidirectional
+        self.names = []
+        self.index = {}
+        self.city_names = {}
+        self.positions = {}
+        self.sources = array('i')
+        self.targets = array('i')
+        # Integral weights are kept exact in int64; the first fractional
+        # weight turns the whole array into float64
+        self.weights = array('q')
+
+    def intern(self, name):
+        node_id = self.index.get(name)
+        if node_id is None:
+            node_id = self.index[name] = len(self.names)
+            self.names.append(name)
+        return node_id
+
+    def add_node(self, name, city_name=None, x=None, y=None):
+        self.intern(name)
+        if city_name:
+            self.city_names[name] = city_name
+        if x is not None and y is not None:
+            self.positions[name] = (float(x), float(y))
+
+    def add_edge(self, source, target, weight):
+        weight = _parse_weight(weight)
+        if isinstance(weight, int):
+            if not -2 ** 63 <= weight < 2 ** 63:
+                raise ValueError(f"Weight {weight} of {source} -> {target} does not fit in 64 bits")
+        elif self.weights.typecode == 'q':
+            self.weights = array('d', self.weights)
+        u, v = self.intern(source), self.intern(target)
+        self.sources.append(u)
+        self.targets.append(v)
+        self.weights.append(weight)
+        if self.bidirectional and u != v:
+            self.sources.append(v)
+            self.targets.append(u)
+            self.weights.append(weight)
+
+    def build(self):
+        compact = CompactGraph.from_edge_arrays(self.names, self.sources, self.targets, self.weights)
+        return Graph.from_compact(compact, self.city_names, self.positions)
+
+
+def _parse_weight(value):
+    """Parse a weight, keeping integral values as int."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    text = str(value).strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def load_csv(edges_path, nodes_path=None, bidirectional=True):
+    """
+    Load an edge-list CSV topology, reading it row by row.
+
+    Args:
+        edges_path: CSV with a header containing source, target, weight
+        nodes_path: Optional CSV with a header containing code and any of
+            name, x, y
+        bidirectional: Add the reverse of every edge
+
+    Returns:
+        Graph: Graph backed by the compact form
+
+    Raises:
+        ValueError: If an integral weight does not fit in 64 bits
+    """
+    builder = _TopologyBuilder(bidirectional)
+
+    if nodes_path is not None:
+        with open(nodes_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                builder.add_node(row['code'], row.get('name'), row.get('x') or None, row.get('y') or None)
+
+    with open(edges_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            builder.add_edge(row['source'], row['target'], row['weight'])
+
+    return builder.build()
+
+
+def load_json(path, bidirectional=True):
+    """
+    Load a JSON Lines topology, decoding one record per line.
+
+    Each line is either a node record {"node": "C", "name": "Casablanca",
+    "x": -5, "y": 0} (name and coordinates optional) or an edge record
+    {"source": "C", "target": "R", "weight": 11}.
+
+    Args:
+        path: JSON Lines file
+        bidirectional: Add the reverse of every edge
+
+    Returns:
+        Graph: Graph backed by the compact form
+
+    Raises:
+        ValueError: If an integral weight does not fit in 64 bits
+    """
+    builder = _TopologyBuilder(bidirectional)
+
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'node' in record:
+                builder.add_node(record['node'], record.get('name'), record.get('x'), record.get('y'))
+            elif 'source' in record:
+                builder.add_edge(record['source'], record['target'], record['weight'])
+            else:
+                raise ValueError(f"{path}:{line_number}: record is neither a node nor an edge")
+
+    return builder.build()
+
+
+def save_snapshot(graph, path):
+    """
+    Write a binary snapshot of a graph.
+
+    Layout (little endian, every section 8-byte aligned): header, JSON node
+    table (codes and full names), coordinates (float64 x/y pairs, only if
+    every node has one), offsets (int64), targets (int32) and weights
+    (int64 or float64).
+
+    Args:
+        graph: Graph to save
+        path: Output file
+    """
+    compact = graph.freeze()
+    offsets, targets, weights = compact.as_numpy()
+    names = compact.names
+    positions = graph.get_positions()
+    has_coordinates = bool(names) and all(name in positions for name in names)
+
+    metadata = json.dumps({
+        'nodes': names,
+        'names': [graph.city_names.get(name) for name in names],
+    }, ensure_ascii=False).encode('utf-8')
+    typecode = b'q' if weights.dtype.kind in 'iu' else b'd'
+
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(names), len(targets), typecode,
+                                     b'\x01' if has_coordinates else b'\x00', len(metadata)))
+        f.write(_padded(metadata))
+        if has_coordinates:
+            f.write(array('d', (c for name in names for c in positions[name])).tobytes())
+        f.write(offsets.astype('<i8').tobytes())
+        f.write(_padded(targets.astype('<i4').tobytes()))
+        f.write(weights.astype('<i8' if typecode == b'q' else '<f8').tobytes())
+
+
+def load_snapshot(path):
+    """
+    Memory-map a binary snapshot written by save_snapshot.
+
+    The CSR buffers are zero-copy views of the mapping, so startup cost does
+    not depend on the number of edges beyond reading the node table.
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Graph: Graph backed by the mapped compact form
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, n, m, typecode, has_coordinates, metadata_length = SNAPSHOT_HEADER.unpack_from(mapping)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a topology snapshot")
+
+    view = memoryview(mapping)
+    position = SNAPSHOT_HEADER.size
+    metadata = json.loads(bytes(view[position:position + metadata_length]).decode('utf-8'))
+    position += _aligned(metadata_length)
+
+    names = metadata['nodes']
+    city_names = {name: city for name, city in zip(names, metadata['names']) if city}
+
+    positions = {}
+    if has_coordinates == b'\x01':
+        coordinates = view[position:position + 16 * n].cast('d')
+        positions = {name: (coordinates[2 * i], coordinates[2 * i + 1]) for i, name in enumerate(names)}
+        position += 16 * n
+
+    offsets = view[position:position + 8 * (n + 1)].cast('q')
+    position += 8 * (n + 1)
+    targets = view[position:position + 4 * m].cast('i')
+    position += _aligned(4 * m)
+    weights = view[position:position + 8 * m].cast(typecode.decode())
+
+    compact = CompactGraph(names, offsets, targets, weights)
+    return Graph.from_compact(compact, city_names, positions)
+
+
+def load_topology(path):
+    """Load a topology, choosing the format from the file extension."""
+    if path.endswith('.csv'):
+        return load_csv(path)
+    if path.endswith(('.json', '.jsonl')):
+        return load_json(path)
+    return load_snapshot(path)
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _padded(data):
+    return data + b'\x00' * (_aligned(len(data)) - len(data))